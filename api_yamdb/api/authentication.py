@@ -0,0 +1,7 @@
+from rest_framework.authentication import BaseAuthentication
+
+
+class BatchAuthentication(BaseAuthentication):
+
+    def authenticate(self, request):
+        return getattr(request._request, 'batch_auth', None)
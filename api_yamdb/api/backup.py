@@ -0,0 +1,172 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from django.conf import settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODEC_SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd'}
+
+
+def codec_for(path):
+    return CODEC_SUFFIXES.get(os.path.splitext(path)[1])
+
+
+@contextmanager
+def open_packed(path, mode, codec):
+    if codec == 'gzip':
+        level = settings.BACKUP_GZIP_LEVEL
+        with gzip.open(path, mode, compresslevel=level) as packed:
+            yield packed
+    elif codec == 'zstd':
+        with open(path, mode) as raw:
+            if mode == 'wb':
+                compressor = zstandard.ZstdCompressor(
+                    level=settings.BACKUP_ZSTD_LEVEL)
+                with compressor.stream_writer(raw) as packed:
+                    yield packed
+            else:
+                yield zstandard.ZstdDecompressor().stream_reader(raw)
+    else:
+        with open(path, mode) as raw:
+            yield raw
+
+
+def temporary_path(directory):
+    descriptor, path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(descriptor)
+    return path
+
+
+def remove(*paths):
+    for path in paths:
+        if path is not None and os.path.exists(path):
+            os.unlink(path)
+
+
+class TooManyRestarts(Exception):
+    pass
+
+
+def copy_database(source, target, pages, sleep, progress=None):
+    state = {'remaining': None, 'restarts': 0, 'total': 0}
+
+    def step(status, remaining, total):
+        if status == sqlite3.SQLITE_OK and state['remaining'] is not None \
+                and remaining >= state['remaining']:
+            state['restarts'] += 1
+            if state['restarts'] > settings.BACKUP_MAX_RESTARTS:
+                raise TooManyRestarts
+        state['remaining'] = remaining
+        state['total'] = total
+        if progress is not None:
+            progress(total - remaining, total)
+        if remaining and sleep:
+            time.sleep(sleep)
+
+    wal = source.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    if wal:
+        source.execute('BEGIN')
+        source.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+    try:
+        source.backup(target, pages=pages, progress=step)
+    except TooManyRestarts:
+        source.backup(target, progress=step)
+    finally:
+        if wal:
+            source.execute('COMMIT')
+    return state['total'], state['restarts']
+
+
+def integrity_errors(path):
+    connection = sqlite3.connect(f'file:{quote(path)}?mode=ro', uri=True)
+    try:
+        rows = connection.execute('PRAGMA integrity_check').fetchall()
+    finally:
+        connection.close()
+    return [message for message, in rows if message != 'ok']
+
+
+def take_snapshot(source, target, codec=None, pages=None, sleep=None,
+                  verify=True, progress=None):
+    directory = os.path.dirname(os.path.abspath(target))
+    os.makedirs(directory, exist_ok=True)
+    raw = temporary_path(directory)
+    packed = None
+    try:
+        destination = sqlite3.connect(raw)
+        try:
+            total, restarts = copy_database(
+                source, destination,
+                pages or settings.BACKUP_PAGES_PER_STEP,
+                settings.BACKUP_STEP_SLEEP if sleep is None else sleep,
+                progress
+            )
+            destination.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            destination.close()
+        errors = integrity_errors(raw) if verify else []
+        if errors:
+            return {'errors': errors}
+        if codec is None:
+            os.replace(raw, target)
+        else:
+            packed = temporary_path(directory)
+            with open(raw, 'rb') as unpacked, \
+                    open_packed(packed, 'wb', codec) as output:
+                shutil.copyfileobj(unpacked, output)
+            os.replace(packed, target)
+        return {
+            'errors': [],
+            'pages': total,
+            'restarts': restarts,
+            'size': os.path.getsize(target),
+        }
+    finally:
+        remove(raw, packed)
+
+
+def unpack_snapshot(source, directory):
+    raw = temporary_path(directory)
+    try:
+        with open_packed(source, 'rb', codec_for(source)) as packed, \
+                open(raw, 'wb') as output:
+            shutil.copyfileobj(packed, output)
+    except BaseException:
+        remove(raw)
+        raise
+    return raw
+
+
+def restore_snapshot(source, target=None, connection=None, pages=None,
+                     sleep=None):
+    directory = os.path.dirname(os.path.abspath(target or source))
+    raw = unpack_snapshot(source, directory)
+    try:
+        errors = integrity_errors(raw)
+        if errors:
+            return errors
+        if target is not None:
+            os.replace(raw, target)
+            return []
+        snapshot = sqlite3.connect(raw)
+        try:
+            copy_database(
+                snapshot, connection,
+                pages or settings.BACKUP_PAGES_PER_STEP,
+                settings.BACKUP_STEP_SLEEP if sleep is None else sleep
+            )
+        finally:
+            snapshot.close()
+        return []
+    finally:
+        remove(raw)
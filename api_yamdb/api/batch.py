@@ -0,0 +1,130 @@
+import io
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections, connection
+from django.urls import Resolver404, resolve
+
+from .middleware import admission_gate, overloaded_response, route_class
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+INHERITED_META = (
+    'SERVER_NAME', 'SERVER_PORT', 'SERVER_PROTOCOL', 'SCRIPT_NAME',
+    'REMOTE_ADDR', 'HTTP_HOST', 'HTTP_USER_AGENT', 'HTTP_ACCEPT_LANGUAGE',
+    'HTTP_X_FORWARDED_FOR', 'HTTP_X_FORWARDED_PROTO', 'wsgi.version',
+    'wsgi.url_scheme', 'wsgi.errors', 'wsgi.multithread',
+    'wsgi.multiprocess', 'wsgi.run_once',
+)
+
+executor = None
+executor_lock = threading.Lock()
+
+
+def get_executor():
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                settings.BATCH_MAX_WORKERS, thread_name_prefix='batch')
+        return executor
+
+
+def build_request(request, item):
+    parts = urlsplit(item['url'])
+    body = json.dumps(item['body']).encode() if 'body' in item else b''
+    environ = {
+        key: request.META[key] for key in INHERITED_META
+        if key in request.META
+    }
+    environ.update({
+        'REQUEST_METHOD': item['method'],
+        'PATH_INFO': parts.path,
+        'QUERY_STRING': parts.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'HTTP_ACCEPT': 'application/json',
+        'wsgi.input': io.BytesIO(body),
+    })
+    environ.setdefault('SCRIPT_NAME', '')
+    environ.setdefault('wsgi.url_scheme', request.scheme)
+    sub_request = WSGIRequest(environ)
+    if request.user.is_authenticated:
+        sub_request.batch_auth = (request.user, request.auth)
+    return sub_request
+
+
+def response_body(response):
+    if hasattr(response, 'data'):
+        return response.data
+    if hasattr(response, 'render'):
+        response.render()
+    content = response.content.decode(response.charset)
+    try:
+        return json.loads(content)
+    except ValueError:
+        return content
+
+
+def dispatch(sub_request, item):
+    try:
+        match = resolve(sub_request.path_info)
+    except Resolver404:
+        return {'status': 404, 'body': {'detail': 'Страница не найдена.'}}
+    try:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception('Ошибка подзапроса %s %s', item['method'],
+                         item['url'])
+        return {'status': 500, 'body': {'detail': 'Ошибка сервера.'}}
+    return {'status': response.status_code, 'body': response_body(response)}
+
+
+def run_item(request, item):
+    sub_request = build_request(request, item)
+    if not settings.ADMISSION_CONTROL_ENABLED:
+        return dispatch(sub_request, item)
+    route = route_class(sub_request)
+    gate = admission_gate(route)
+    low_priority = (
+        route == 'read' and 'HTTP_AUTHORIZATION' not in request.META)
+    if not gate.acquire(low_priority, settings.ADMISSION_MAX_WAIT):
+        response = overloaded_response()
+        return {'status': response.status_code,
+                'body': response_body(response)}
+    try:
+        return dispatch(sub_request, item)
+    finally:
+        gate.release()
+
+
+def run_concurrent(request, item):
+    try:
+        return run_item(request, item)
+    finally:
+        close_old_connections()
+
+
+def execute(request, items):
+    concurrent = (
+        settings.BATCH_MAX_WORKERS > 1 and not connection.in_atomic_block)
+    results = [None] * len(items)
+    pending = []
+    for index, item in enumerate(items):
+        if concurrent and item['method'] in SAFE_METHODS:
+            pending.append((index, get_executor().submit(
+                run_concurrent, request, item)))
+            continue
+        for pending_index, future in pending:
+            results[pending_index] = future.result()
+        pending = []
+        results[index] = run_item(request, item)
+    for pending_index, future in pending:
+        results[pending_index] = future.result()
+    return results
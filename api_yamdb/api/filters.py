@@ -1,17 +1,19 @@
 from django_filters import rest_framework as filt
+from rest_framework.exceptions import ValidationError
 
 from reviews.models import Title
 
 
+FACET_PARAMS = ('genre__all', 'genre__any', 'genre__not', 'category__in',
+                'year__gte', 'year__lte', 'facets')
+
+
 class TitlesFilter(filt.FilterSet):
     category = filt.CharFilter(
         field_name='category__slug',
         lookup_expr='icontains',
     )
-    genre = filt.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains',
-    )
+    genre = filt.CharFilter(method='filter_genre')
     name = filt.CharFilter(
         field_name='name',
         lookup_expr='icontains',
@@ -20,3 +22,40 @@ class TitlesFilter(filt.FilterSet):
     class Meta:
         model = Title
         fields = ('category', 'genre', 'name', 'year')
+
+    def filter_genre(self, queryset, name, value):
+        if ',' in value:
+            return queryset.none()
+        return queryset.filter(genre_slugs__icontains=value)
+
+
+def split_slugs(value):
+    return [slug.strip() for slug in value.split(',') if slug.strip()]
+
+
+def parse_year(params, name):
+    if not params.get(name):
+        return None
+    try:
+        return int(params[name])
+    except ValueError:
+        raise ValidationError({name: 'Ожидается целое число.'})
+
+
+def facet_params(params):
+    if not any(name in params for name in FACET_PARAMS):
+        return None
+    year = parse_year(params, 'year')
+    year_min = parse_year(params, 'year__gte')
+    year_max = parse_year(params, 'year__lte')
+    return {
+        'genre_all': split_slugs(params.get('genre__all', '')),
+        'genre_any': split_slugs(params.get('genre__any', '')),
+        'genre_not': split_slugs(params.get('genre__not', '')),
+        'genre_contains': params.get('genre'),
+        'categories': split_slugs(params.get('category__in', '')),
+        'category_contains': params.get('category'),
+        'year_min': year if year is not None else year_min,
+        'year_max': year if year is not None else year_max,
+        'name_contains': params.get('name'),
+    }
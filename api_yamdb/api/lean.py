@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.contrib.auth import middleware as auth
+from django.contrib.messages import middleware as messages
+from django.contrib.sessions import middleware as sessions
+from django.middleware import csrf
+
+
+def is_lean(request):
+    return request.path_info.startswith(
+        tuple(settings.LEAN_MIDDLEWARE_PREFIXES))
+
+
+class LeanRouteMixin:
+
+    def __call__(self, request):
+        if is_lean(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(LeanRouteMixin, sessions.SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(LeanRouteMixin, csrf.CsrfViewMiddleware):
+
+    def process_view(self, request, callback, callback_args,
+                     callback_kwargs):
+        if is_lean(request):
+            return None
+        return super().process_view(
+            request, callback, callback_args, callback_kwargs)
+
+
+class AuthenticationMiddleware(LeanRouteMixin, auth.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(LeanRouteMixin, messages.MessageMiddleware):
+    pass
@@ -0,0 +1,41 @@
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время обработки запроса к API с полным стеком '
+            'middleware и с пропуском сессий, CSRF, auth и messages.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'urls', nargs='*',
+            default=['/api/v1/categories/', '/api/v1/titles/'])
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for url in options['urls']:
+            with override_settings(LEAN_MIDDLEWARE_PREFIXES=()):
+                full = self.measure(url, options['requests'])
+            lean = self.measure(url, options['requests'])
+            self.stdout.write(
+                f'{url}: полный стек {full * 1e6:8.1f} мкс, '
+                f'облегчённый {lean * 1e6:8.1f} мкс '
+                f'(экономия {(full - lean) * 1e6:6.1f} мкс на запрос)'
+            )
+
+    def measure(self, url, count):
+        handler = WSGIHandler()
+        environ = RequestFactory().get(url).environ
+
+        def start_response(status, headers):
+            pass
+
+        for _ in range(min(count, 50)):
+            b''.join(handler(dict(environ), start_response))
+        started = time.process_time()
+        for _ in range(count):
+            b''.join(handler(dict(environ), start_response))
+        return (time.process_time() - started) / count
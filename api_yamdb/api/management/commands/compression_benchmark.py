@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from api.middleware import COMPRESSORS
+
+
+DEFAULT_LEVELS = {
+    'gzip': (1, 6, 9),
+    'br': (1, 5, 11),
+    'zstd': (1, 3, 19),
+}
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает размер и затраты CPU на сжатие ответов API '
+            'для доступных кодировок.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'urls', nargs='*', default=['/api/v1/titles/'])
+        parser.add_argument('--levels', type=int, nargs='+')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        client = Client()
+        for url in options['urls']:
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: статус {response.status_code}')
+            body = response.content
+            self.stdout.write(f'{url}: {len(body)} байт')
+            for encoding, compressor in COMPRESSORS.items():
+                for level in options['levels'] or DEFAULT_LEVELS[encoding]:
+                    started = time.process_time()
+                    for _ in range(options['repeat']):
+                        compressed = compressor(body, level)
+                    cpu = (time.process_time() - started) / options['repeat']
+                    saved = 1 - len(compressed) / len(body) if body else 0
+                    self.stdout.write(
+                        f'  {encoding:<5} level={level:<2} '
+                        f'{len(compressed):>9} байт  '
+                        f'экономия {saved:6.1%}  '
+                        f'CPU {cpu * 1000:8.3f} мс'
+                    )
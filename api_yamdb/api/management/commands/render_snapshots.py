@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.snapshots import render_snapshots, snapshot_path
+
+
+class Command(BaseCommand):
+    help = ('Заранее рендерит публичные страницы каталога в статические '
+            'JSON-файлы для раздачи без обращения к Django.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'urls', nargs='*',
+            help='Адреса для рендера; по умолчанию CATALOG_SNAPSHOT_URLS.')
+
+    def handle(self, *args, **options):
+        rendered = render_snapshots(options['urls'] or None)
+        for url in rendered:
+            self.stdout.write(f'{url} -> {snapshot_path(url)}')
+        self.stdout.write(
+            self.style.SUCCESS(f'Отрендерено страниц: {len(rendered)}'))
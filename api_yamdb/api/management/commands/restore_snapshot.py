@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.backup import codec_for, restore_snapshot, zstandard
+
+
+class Command(BaseCommand):
+    help = ('Разворачивает снимок базы: в отдельный файл для реплики '
+            'или стенда нагрузочных тестов либо в текущую базу.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('source')
+        parser.add_argument(
+            '--target',
+            help='Файл, в который развернуть снимок, вместо текущей базы.')
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--pages', type=int)
+        parser.add_argument('--sleep', type=float)
+
+    def handle(self, *args, **options):
+        if codec_for(options['source']) == 'zstd' and zstandard is None:
+            raise CommandError('Для распаковки zstd установите zstandard.')
+        connection = None
+        if options['target'] is None:
+            database = connections[options['database']]
+            if database.vendor != 'sqlite':
+                raise CommandError(
+                    'Снимки поддерживаются только для SQLite.')
+            database.ensure_connection()
+            connection = database.connection
+        errors = restore_snapshot(
+            options['source'], options['target'], connection,
+            pages=options['pages'], sleep=options['sleep']
+        )
+        if errors:
+            raise CommandError(
+                'Снимок не прошёл проверку целостности: '
+                + '; '.join(errors[:10]))
+        self.stdout.write(self.style.SUCCESS(
+            f'Снимок {options["source"]} развёрнут в '
+            f'{options["target"] or options["database"]}'
+        ))
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.backup import codec_for, take_snapshot, zstandard
+
+
+class Command(BaseCommand):
+    help = ('Делает согласованный снимок работающей базы SQLite '
+            'через online backup API, не останавливая запись.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('target')
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--compress', choices=('auto', 'none', 'gzip', 'zstd'),
+            default='auto',
+            help='По умолчанию сжатие выбирается по расширению файла.')
+        parser.add_argument('--pages', type=int)
+        parser.add_argument('--sleep', type=float)
+        parser.add_argument('--no-verify', action='store_true')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('Снимки поддерживаются только для SQLite.')
+        codec = options['compress']
+        if codec == 'auto':
+            codec = codec_for(options['target'])
+        elif codec == 'none':
+            codec = None
+        if codec == 'zstd' and zstandard is None:
+            raise CommandError('Для сжатия zstd установите zstandard.')
+        connection.ensure_connection()
+        result = take_snapshot(
+            connection.connection, options['target'], codec,
+            pages=options['pages'], sleep=options['sleep'],
+            verify=not options['no_verify'],
+            progress=self.report if options['verbosity'] > 1 else None
+        )
+        if result['errors']:
+            raise CommandError(
+                'Снимок не прошёл проверку целостности: '
+                + '; '.join(result['errors'][:10]))
+        self.stdout.write(self.style.SUCCESS(
+            f'Снимок сохранён в {options["target"]}: '
+            f'страниц {result["pages"]}, {result["size"] // 1024} КБ, '
+            f'перезапусков {result["restarts"]}'
+        ))
+
+    def report(self, copied, total):
+        self.stdout.write(f'Скопировано страниц: {copied}/{total}')
@@ -0,0 +1,123 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROBE = '''
+import json
+import resource
+import sys
+import time
+
+started = time.perf_counter()
+import django
+from django.apps.config import AppConfig
+
+ready_times = {}
+create = AppConfig.create.__func__
+
+
+def timed_create(cls, entry):
+    config = create(cls, entry)
+    ready = config.ready
+
+    def timed_ready():
+        ready_started = time.perf_counter()
+        ready()
+        ready_times[config.label] = time.perf_counter() - ready_started
+
+    config.ready = timed_ready
+    return config
+
+
+AppConfig.create = classmethod(timed_create)
+setup_started = time.perf_counter()
+django.setup()
+setup = time.perf_counter() - setup_started
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory
+
+request_started = time.perf_counter()
+handler = WSGIHandler()
+environ = RequestFactory().get(sys.argv[1]).environ
+b''.join(handler(environ, lambda status, headers: None))
+first_request = time.perf_counter() - request_started
+
+print(json.dumps({
+    'setup': setup,
+    'ready': ready_times,
+    'first_request': first_request,
+    'total': time.perf_counter() - started,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+'''
+
+
+def parse_import_times(stderr):
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '[us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = ('Профилирует запуск воркера: время импорта модулей, '
+            'ready() приложений, первый запрос и память.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/api/v1/')
+        parser.add_argument('--top', type=int, default=25)
+
+    def handle(self, *args, **options):
+        self.report(self.profile(options), options['top'])
+
+    def profile(self, options):
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'api_yamdb.settings'),
+        )
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE,
+             options['url']],
+            cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr[-2000:])
+        profile = json.loads(result.stdout.strip().splitlines()[-1])
+        profile['modules'] = parse_import_times(result.stderr)
+        return profile
+
+    def report(self, profile, top):
+        modules = profile['modules']
+        packages = {}
+        for name, own, _ in modules:
+            package = name.split('.')[0]
+            packages[package] = packages.get(package, 0) + own
+        self.stdout.write(f'Модулей импортировано: {len(modules)}')
+        self.stdout.write('Пакеты по собственному времени импорта:')
+        for package, own in sorted(
+                packages.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f'  {own / 1000:9.1f} мс  {package}')
+        self.stdout.write('Модули по накопленному времени импорта:')
+        for name, _, cumulative in sorted(
+                modules, key=lambda item: -item[2])[:top]:
+            self.stdout.write(f'  {cumulative / 1000:9.1f} мс  {name}')
+        self.stdout.write('ready() приложений:')
+        for label, seconds in sorted(
+                profile['ready'].items(), key=lambda item: -item[1]):
+            self.stdout.write(f'  {seconds * 1000:9.1f} мс  {label}')
+        self.stdout.write(
+            f'django.setup(): {profile["setup"] * 1000:.1f} мс\n'
+            f'Первый запрос: {profile["first_request"] * 1000:.1f} мс\n'
+            f'До первого ответа: {profile["total"] * 1000:.1f} мс\n'
+            f'Пиковая память: {profile["max_rss_kb"] / 1024:.1f} МБ'
+        )
@@ -0,0 +1,420 @@
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def compress_gzip(data, level):
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_brotli(data, level):
+    return brotli.compress(data, quality=level)
+
+
+def compress_zstd(data, level):
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+COMPRESSORS = {'gzip': compress_gzip}
+if brotli is not None:
+    COMPRESSORS['br'] = compress_brotli
+if zstandard is not None:
+    COMPRESSORS['zstd'] = compress_zstd
+
+
+def parse_accept_encoding(header):
+    accepted = {}
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        key, _, value = params.strip().partition('=')
+        if key.strip() == 'q':
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def negotiate_encoding(header):
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for encoding in settings.COMPRESSION_ENCODINGS:
+        if encoding not in COMPRESSORS:
+            continue
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressedVariantCache:
+
+    def __init__(self):
+        self.items = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.items.get(key)
+            if value is not None:
+                self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            if key in self.items:
+                return
+            self.items[key] = value
+            self.size += len(value)
+            while self.size > settings.COMPRESSION_CACHE_BYTES and self.items:
+                _, evicted = self.items.popitem(last=False)
+                self.size -= len(evicted)
+
+
+compressed_variants = CompressedVariantCache()
+compression_lock = threading.Lock()
+compression_counters = {}
+
+
+def count_compression(encoding, bytes_in, bytes_out, seconds, cached):
+    with compression_lock:
+        counters = compression_counters.setdefault(encoding, {
+            'responses': 0, 'cache_hits': 0, 'bytes_in': 0,
+            'bytes_out': 0, 'cpu_seconds': 0.0,
+        })
+        counters['responses'] += 1
+        counters['cache_hits'] += cached
+        counters['bytes_in'] += bytes_in
+        counters['bytes_out'] += bytes_out
+        counters['cpu_seconds'] += seconds
+
+
+def compression_stats():
+    with compression_lock:
+        return {
+            encoding: dict(counters)
+            for encoding, counters in compression_counters.items()
+        }
+
+
+def compress(data, encoding):
+    level = settings.COMPRESSION_LEVELS[encoding]
+    key = (encoding, level, hashlib.sha1(data).digest())
+    compressed = compressed_variants.get(key)
+    if compressed is not None:
+        count_compression(encoding, len(data), len(compressed), 0.0, True)
+        return compressed
+    started = time.process_time()
+    compressed = COMPRESSORS[encoding](data, level)
+    count_compression(
+        encoding, len(data), len(compressed),
+        time.process_time() - started, False
+    )
+    compressed_variants.set(key, compressed)
+    return compressed
+
+
+class CompressionMiddleware(MiddlewareMixin):
+
+    def process_response(self, request, response):
+        if (response.streaming or response.has_header('Content-Encoding')
+                or len(response.content) < settings.COMPRESSION_MIN_SIZE):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+
+class SnapshotMiddleware(MiddlewareMixin):
+
+    def process_request(self, request):
+        from .snapshots import (SNAPSHOT_HEADER, SNAPSHOT_SUFFIXES,
+                                snapshot_path)
+
+        if (not settings.CATALOG_SNAPSHOTS_ENABLED
+                or request.method not in ('GET', 'HEAD')
+                or 'HTTP_AUTHORIZATION' in request.META
+                or SNAPSHOT_HEADER in request.META):
+            return None
+        url = request.get_full_path()
+        if url not in settings.CATALOG_SNAPSHOT_URLS:
+            return None
+        path = snapshot_path(url)
+        encoding = negotiate_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        candidates = [(path, None)]
+        if encoding is not None:
+            candidates.insert(
+                0, (path + SNAPSHOT_SUFFIXES[encoding], encoding))
+        for candidate, candidate_encoding in candidates:
+            try:
+                with open(candidate, 'rb') as snapshot:
+                    content = snapshot.read()
+            except OSError:
+                continue
+            response = HttpResponse(
+                content, content_type='application/json')
+            response['Content-Length'] = str(len(content))
+            if candidate_encoding is not None:
+                response['Content-Encoding'] = candidate_encoding
+            patch_vary_headers(response, ('Accept-Encoding',))
+            return response
+        return None
+
+
+class AdmissionGate:
+
+    def __init__(self, concurrency, queue):
+        self.concurrency = concurrency
+        self.queue = queue
+        self.condition = threading.Condition()
+        self.active = 0
+        self.waiting = {False: 0, True: 0}
+        self.counters = {
+            'admitted': 0, 'rejected': 0, 'shed': 0, 'timed_out': 0}
+
+    def can_enter(self, low_priority):
+        return self.active < self.concurrency and not self.waiting[False] and (
+            not low_priority or not self.waiting[True])
+
+    def acquire(self, low_priority, timeout):
+        with self.condition:
+            if not self.can_enter(low_priority):
+                queued = self.waiting[False] + self.waiting[True]
+                if queued >= self.queue:
+                    self.counters['rejected'] += 1
+                    return False
+                if low_priority and queued >= (
+                        self.queue * settings.ADMISSION_LOW_PRIORITY_SHARE):
+                    self.counters['shed'] += 1
+                    return False
+                self.waiting[low_priority] += 1
+                try:
+                    admitted = self.condition.wait_for(
+                        lambda: self.active < self.concurrency and (
+                            not low_priority or not self.waiting[False]),
+                        timeout
+                    )
+                finally:
+                    self.waiting[low_priority] -= 1
+                if not admitted:
+                    self.counters['timed_out'] += 1
+                    return False
+            self.active += 1
+            self.counters['admitted'] += 1
+            return True
+
+    def release(self):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def stats(self):
+        with self.condition:
+            return {
+                'concurrency': self.concurrency,
+                'active': self.active,
+                'queue_depth': self.waiting[False] + self.waiting[True],
+                **self.counters,
+            }
+
+
+admission_gates = {}
+admission_lock = threading.Lock()
+
+
+def admission_gate(route_class):
+    with admission_lock:
+        if route_class not in admission_gates:
+            limits = settings.ADMISSION_LIMITS[route_class]
+            admission_gates[route_class] = AdmissionGate(
+                limits['concurrency'], limits['queue'])
+        return admission_gates[route_class]
+
+
+def admission_stats():
+    with admission_lock:
+        gates = dict(admission_gates)
+    return {
+        route_class: gate.stats() for route_class, gate in gates.items()}
+
+
+def route_class(request):
+    if request.path_info.startswith('/api/v1/auth/'):
+        return 'auth'
+    if request.method in ('GET', 'HEAD', 'OPTIONS'):
+        return 'read'
+    return 'write'
+
+
+def overloaded_response():
+    response = JsonResponse(
+        {'detail': 'Сервер перегружен, повторите запрос позже.'},
+        status=503
+    )
+    response['Retry-After'] = str(settings.ADMISSION_RETRY_AFTER)
+    return response
+
+
+class AdmissionMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (not settings.ADMISSION_CONTROL_ENABLED
+                or not request.path_info.startswith('/api/')
+                or request.path_info.startswith('/api/v1/batch/')):
+            return self.get_response(request)
+        route = route_class(request)
+        gate = admission_gate(route)
+        low_priority = (
+            route == 'read' and 'HTTP_AUTHORIZATION' not in request.META)
+        if not gate.acquire(low_priority, settings.ADMISSION_MAX_WAIT):
+            return overloaded_response()
+        try:
+            return self.get_response(request)
+        finally:
+            gate.release()
+
+
+class Flight:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+flights = {}
+flights_lock = threading.Lock()
+coalescing_counters = {'leaders': 0, 'followers': 0, 'fallbacks': 0}
+
+
+def count_coalescing(counter):
+    with flights_lock:
+        coalescing_counters[counter] += 1
+
+
+def coalescing_stats():
+    with flights_lock:
+        return dict(coalescing_counters, in_flight=len(flights))
+
+
+def freeze_response(response):
+    if response.streaming or response.cookies:
+        return None
+    return response.status_code, list(response.items()), response.content
+
+
+def thaw_response(result):
+    status, headers, content = result
+    response = HttpResponse(content, status=status)
+    for header, value in headers:
+        response[header] = value
+    return response
+
+
+class CoalescingMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (not settings.COALESCE_ENABLED
+                or request.method != 'GET'
+                or not request.path_info.startswith('/api/')
+                or request.META.get('HTTP_AUTHORIZATION')
+                or request.META.get('HTTP_COOKIE')):
+            return self.get_response(request)
+        key = hashlib.sha1('\n'.join((
+            request.get_host(),
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+        )).encode()).hexdigest()
+        return self.local_flight(request, key)
+
+    def local_flight(self, request, key):
+        with flights_lock:
+            flight = flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = flights[key] = Flight()
+        if not leader:
+            if flight.done.wait(settings.COALESCE_MAX_WAIT) and flight.result:
+                count_coalescing('followers')
+                return thaw_response(flight.result)
+            count_coalescing('fallbacks')
+            return self.get_response(request)
+        count_coalescing('leaders')
+        try:
+            response = self.compute(request, key)
+            flight.result = freeze_response(response)
+            return response
+        finally:
+            with flights_lock:
+                del flights[key]
+            flight.done.set()
+
+    def compute(self, request, key):
+        if not settings.COALESCE_SHARED_CACHE:
+            return self.get_response(request)
+        cache = caches[settings.COALESCE_SHARED_CACHE]
+        lock_key = f'coalesce:lock:{key}'
+        result_key = f'coalesce:result:{key}'
+        result = cache.get(result_key)
+        if result is not None:
+            return thaw_response(result)
+        if cache.add(lock_key, 1, settings.COALESCE_MAX_WAIT + 1):
+            try:
+                response = self.get_response(request)
+                result = freeze_response(response)
+                if result is not None:
+                    cache.set(
+                        result_key, result, settings.COALESCE_RESULT_TTL)
+                return response
+            finally:
+                cache.delete(lock_key)
+        deadline = time.monotonic() + settings.COALESCE_MAX_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(settings.COALESCE_POLL_INTERVAL)
+            result = cache.get(result_key)
+            if result is not None:
+                return thaw_response(result)
+        count_coalescing('fallbacks')
+        return self.get_response(request)
@@ -1,12 +1,43 @@
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.urls import reverse
 from django.utils import timezone
 
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.validators import UniqueValidator
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (ArchivedReview, Category, Change, Comment, Genre,
+                            Review, Title, User)
+
+
+def select_fields(request, field_names):
+    params = request.query_params if request is not None else {}
+    selected = list(field_names)
+    if params.get('fields'):
+        requested = set(params['fields'].split(','))
+        selected = [name for name in selected if name in requested]
+    if params.get('exclude'):
+        excluded = set(params['exclude'].split(','))
+        selected = [name for name in selected if name not in excluded]
+    return selected
+
+
+class SparseFieldsMixin:
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        nested = self.root not in (self, self.parent)
+        if request is None or request.method not in SAFE_METHODS or nested:
+            return fields
+        return {
+            name: fields[name] for name in select_fields(request, fields)
+        }
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -18,19 +49,24 @@ class ReviewSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        fields = ('id', 'text', 'author', 'score', 'pub_date', 'title')
+        fields = ('id', 'text', 'author', 'score', 'pub_date', 'title',
+                  'comment_count')
+        read_only_fields = ('comment_count',)
         model = Review
 
     def validate(self, data):
         author = self.context['request'].user
         title_id = self.context.get('view').kwargs.get('title_id')
-        if (Review.objects.filter(author=author, title=title_id).exists()
-                and self.context['request'].method != 'PATCH'):
+        if self.context['request'].method == 'PATCH':
+            return data
+        if Review.objects.filter(author=author, title=title_id).exists() or (
+                settings.ARCHIVE_ENABLED and ArchivedReview.objects.filter(
+                    author_id=author.pk, title_id=title_id).exists()):
             raise serializers.ValidationError('Вы уже оставляли отзыв')
         return data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(slug_field='username',
                                           read_only=True,)
 
@@ -39,11 +75,29 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
 
 
+class ExpandedReviewSerializer(ReviewSerializer):
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ('id', 'text', 'author', 'score', 'pub_date',
+                  'comment_count')
+
+
+class ExpandedReviewCommentsSerializer(ExpandedReviewSerializer):
+    comments = CommentSerializer(
+        many=True,
+        read_only=True,
+        source='expanded_comments'
+    )
+
+    class Meta(ExpandedReviewSerializer.Meta):
+        fields = ExpandedReviewSerializer.Meta.fields + ('comments',)
+
+
 class CategorySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Category
-        exclude = ['id']
+        exclude = ['id', 'pending_delete']
 
 
 class GenreSerializer(serializers.ModelSerializer):
@@ -53,15 +107,56 @@ class GenreSerializer(serializers.ModelSerializer):
         exclude = ['id']
 
 
-class TitleSerializerRead(serializers.ModelSerializer):
-    genre = GenreSerializer(many=True)
+class TitleSerializerRead(SparseFieldsMixin, serializers.ModelSerializer):
+    genre = serializers.ReadOnlyField(source='cached_genres')
     category = CategorySerializer()
     rating = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Title
         fields = ('name', 'year', 'description', 'genre',
-                  'category', 'rating', 'id')
+                  'category', 'rating', 'review_count', 'id')
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self.context.get('expand', ())
+        if 'reviews' in expand:
+            serializer = (
+                ExpandedReviewCommentsSerializer
+                if 'reviews.comments' in expand
+                else ExpandedReviewSerializer
+            )
+            fields['reviews'] = serializer(
+                many=True, read_only=True, source='expanded_reviews')
+        return fields
+
+
+class TitleDetailSerializer(TitleSerializerRead):
+    score_histogram = serializers.ListField(
+        source='ranking.histogram',
+        child=serializers.IntegerField(),
+        read_only=True
+    )
+
+    class Meta(TitleSerializerRead.Meta):
+        fields = TitleSerializerRead.Meta.fields + ('score_histogram',)
+
+
+class TopTitleSerializer(TitleSerializerRead):
+    weighted_rating = serializers.FloatField(
+        source='ranking.weighted_rating',
+        read_only=True
+    )
+
+    class Meta(TitleSerializerRead.Meta):
+        fields = TitleSerializerRead.Meta.fields + ('weighted_rating',)
+
+
+class SimilarTitleSerializer(TitleSerializerRead):
+    similarity = serializers.FloatField(read_only=True)
+
+    class Meta(TitleSerializerRead.Meta):
+        fields = TitleSerializerRead.Meta.fields + ('similarity',)
 
 
 class TitleSerializer(serializers.ModelSerializer):
@@ -72,14 +167,15 @@ class TitleSerializer(serializers.ModelSerializer):
         many=True,
     )
     category = serializers.SlugRelatedField(
-        queryset=Category.objects.all(),
+        queryset=Category.objects.filter(pending_delete=False),
         required=False,
         slug_field='slug'
     )
 
     class Meta:
         model = Title
-        fields = ('__all__')
+        exclude = ('pending_delete',)
+        read_only_fields = ('review_count',)
 
     def validate_year(self, value):
 
@@ -138,7 +234,7 @@ class TokenSerializer(serializers.Serializer):
         fields = ['username', 'confirmation_code']
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
 
     email = serializers.EmailField(
         max_length=150,
@@ -193,3 +289,37 @@ class MeSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'first_name',
                   'last_name', 'bio', 'role']
         model = User
+
+
+class ChangeSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Change
+        fields = ('id', 'model', 'object_id', 'parent_id', 'action',
+                  'created')
+
+
+class BatchItemSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(
+        choices=('GET', 'POST', 'PUT', 'PATCH', 'DELETE'), default='GET')
+    url = serializers.CharField(max_length=2000)
+    body = serializers.JSONField(required=False)
+
+    def validate_url(self, value):
+        parts = urlsplit(value)
+        if (parts.scheme or parts.netloc
+                or not parts.path.startswith('/api/')
+                or parts.path == reverse('batch')):
+            raise serializers.ValidationError(
+                'Допустимы только адреса API, кроме самого пакета.')
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = BatchItemSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f'Не больше {settings.BATCH_MAX_REQUESTS} запросов в пакете.')
+        return value
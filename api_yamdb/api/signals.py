@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.changes import changes_recorded
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+from .snapshots import mark_dirty
+from .writer import enable_wal
+
+SNAPSHOT_MODELS = (Category, Comment, Genre, Review, Title, User)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+@receiver(changes_recorded)
+def invalidate_snapshots(sender, **kwargs):
+    if sender is User and kwargs.get('created'):
+        return
+    if settings.CATALOG_SNAPSHOTS_ENABLED and sender in SNAPSHOT_MODELS:
+        transaction.on_commit(lambda: mark_dirty(sender))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genre_snapshots(sender, action, **kwargs):
+    if (settings.CATALOG_SNAPSHOTS_ENABLED
+            and action in ('post_add', 'post_remove', 'post_clear')):
+        transaction.on_commit(lambda: mark_dirty(Title))
+
+
+connection_created.connect(enable_wal)
@@ -0,0 +1,159 @@
+import io
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connection
+
+from .middleware import COMPRESSORS
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_HEADER = 'HTTP_X_SNAPSHOT_RENDER'
+SNAPSHOT_SUFFIXES = {'gzip': '.gz', 'br': '.br', 'zstd': '.zst'}
+SNAPSHOT_DEPENDENCIES = (
+    (re.compile(r'^/api/v1/titles/\d+/reviews/'),
+     ('reviews.Review', 'reviews.Comment', 'users.User')),
+    (re.compile(r'^/api/v1/titles/'),
+     ('reviews.Title', 'reviews.Review', 'reviews.Genre', 'reviews.Category')),
+    (re.compile(r'^/api/v1/genres/'), ('reviews.Genre',)),
+    (re.compile(r'^/api/v1/categories/'), ('reviews.Category',)),
+)
+
+pending = set()
+pending_lock = threading.Lock()
+timer = None
+handler = None
+handler_lock = threading.Lock()
+
+
+def snapshot_path(url):
+    parts = urlsplit(url)
+    name = 'index__' + parts.query if parts.query else 'index'
+    return os.path.join(
+        settings.CATALOG_SNAPSHOT_DIR,
+        parts.path.strip('/'),
+        name + '.json'
+    )
+
+
+def write_atomic(path, content):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as output:
+            output.write(content)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def get_handler():
+    global handler
+    with handler_lock:
+        if handler is None:
+            handler = BaseHandler()
+            handler.load_middleware()
+        return handler
+
+
+def snapshot_request(url):
+    parts = urlsplit(url)
+    return WSGIRequest({
+        'REQUEST_METHOD': 'GET',
+        'SCRIPT_NAME': '',
+        'PATH_INFO': parts.path,
+        'QUERY_STRING': parts.query,
+        'SERVER_NAME': settings.CATALOG_SNAPSHOT_HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': settings.CATALOG_SNAPSHOT_HOST,
+        'HTTP_ACCEPT': 'application/json',
+        SNAPSHOT_HEADER: '1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    })
+
+
+def render_snapshot(url):
+    response = get_handler().get_response(snapshot_request(url))
+    path = snapshot_path(url)
+    if response.status_code != 200:
+        logger.warning('Snapshot %s skipped: status %s',
+                       url, response.status_code)
+        return False
+    for encoding, compressor in COMPRESSORS.items():
+        write_atomic(
+            path + SNAPSHOT_SUFFIXES[encoding],
+            compressor(
+                response.content, settings.COMPRESSION_LEVELS[encoding])
+        )
+    write_atomic(path, response.content)
+    return True
+
+
+def render_snapshots(urls=None):
+    return [
+        url for url in urls or settings.CATALOG_SNAPSHOT_URLS
+        if render_snapshot(url)
+    ]
+
+
+def snapshot_urls_for(model):
+    label = model._meta.label
+    dirty = []
+    for url in settings.CATALOG_SNAPSHOT_URLS:
+        path = urlsplit(url).path
+        for pattern, labels in SNAPSHOT_DEPENDENCIES:
+            if pattern.match(path):
+                if label in labels:
+                    dirty.append(url)
+                break
+    return dirty
+
+
+def mark_dirty(model):
+    if not settings.CATALOG_SNAPSHOTS_ENABLED:
+        return
+    urls = snapshot_urls_for(model)
+    if not urls:
+        return
+    if not settings.CATALOG_SNAPSHOT_DEBOUNCE:
+        render_snapshots(urls)
+        return
+    global timer
+    with pending_lock:
+        pending.update(urls)
+        if timer is None:
+            timer = threading.Timer(
+                settings.CATALOG_SNAPSHOT_DEBOUNCE, flush_pending)
+            timer.daemon = True
+            timer.start()
+
+
+def flush_pending():
+    global timer
+    with pending_lock:
+        urls = list(pending)
+        pending.clear()
+        timer = None
+    try:
+        render_snapshots(urls)
+    except Exception:
+        logger.exception('Snapshot regeneration failed')
+    finally:
+        connection.close()
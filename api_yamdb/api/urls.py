@@ -2,9 +2,10 @@ from django.urls import include, path
 
 from rest_framework.routers import DefaultRouter
 
-from .views import (CategoryViewSet, CommentViewSet,
-                    GenreViewSet, RegisterView, ReviewViewSet,
-                    TitleViewSet, TokenView, UserViewSet)
+from .views import (AdmissionStatsView, BatchView, CategoryViewSet,
+                    ChangeFeedView, CommentViewSet, GenreViewSet,
+                    RegisterView, ReviewViewSet, TitleViewSet, TokenView,
+                    UserViewSet)
 
 
 router = DefaultRouter()
@@ -22,6 +23,9 @@ router.register('categories', CategoryViewSet, basename='categories')
 
 urlpatterns = [
     path('v1/', include(router.urls)),
+    path('v1/changes/', ChangeFeedView.as_view(), name='changes'),
+    path('v1/batch/', BatchView.as_view(), name='batch'),
+    path('v1/admission/', AdmissionStatsView.as_view(), name='admission'),
     path('v1/auth/signup/', RegisterView.as_view(), name='register'),
     path('v1/auth/token/', TokenView.as_view(), name='token')
 ]
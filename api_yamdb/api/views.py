@@ -1,39 +1,187 @@
+from functools import partial
+
 from django.conf import settings
 from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import (Avg, Case, ExpressionWrapper, F, FloatField,
+                              OuterRef, Prefetch, Subquery, When)
+from django.db.models.functions import NullIf
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 
 import jwt
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins
 from rest_framework.decorators import action
-from rest_framework import filters, permissions, status, viewsets
+from rest_framework import filters, generics, permissions, status, viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.permissions import (SAFE_METHODS,
+                                        IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from reviews.models import Category, Genre, Review, Title
+from reviews.archive import ArchivePage, hydrate
+from reviews.changes import changes_since
+from reviews.deletion import delete_instance
+from reviews.facets import FacetPage, title_index
+from reviews.models import (ArchivedComment, ArchivedReview, Category,
+                            Comment, Genre, Review, Title)
 from users.models import User
-from .filters import TitlesFilter
+from .batch import execute
+from .filters import TitlesFilter, facet_params
+from .middleware import admission_stats
 from .permissions import AdminOnly, IsAdminOrMod, IsAdminOrReadOnly, OwnerOnly
-from .serializers import (CategorySerializer, CommentSerializer,
+from .serializers import (BatchSerializer, CategorySerializer,
+                          ChangeSerializer, CommentSerializer,
                           GenreSerializer, MeSerializer, RegisterSerializer,
-                          ReviewSerializer, TitleSerializer,
-                          TitleSerializerRead, TokenSerializer, UserSerializer)
+                          ReviewSerializer, SimilarTitleSerializer,
+                          TitleDetailSerializer, TitleSerializer,
+                          TitleSerializerRead, TokenSerializer,
+                          TopTitleSerializer, UserSerializer, select_fields)
+from .writer import queued
+
+
+TRUE_VALUES = ('1', 'true', 'True')
+EXPANSIONS = {'reviews', 'reviews.comments'}
+
+
+def title_rating():
+    average = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title').annotate(average=Avg('score'))
+    return Case(
+        When(ranking__isnull=True, then=Subquery(
+            average.values('average'), output_field=FloatField())),
+        default=ExpressionWrapper(
+            F('ranking__score_sum') * 1.0 / NullIf(F('ranking__votes'), 0),
+            output_field=FloatField()
+        ),
+        output_field=FloatField()
+    )
+
+
+class SparseFieldsViewMixin:
+
+    def get_sparse_fields(self):
+        if self.request.method not in SAFE_METHODS:
+            return None
+        return set(select_fields(
+            self.request, self.get_serializer_class().Meta.fields))
+
+
+class QueuedWriteMixin:
+    write_hooks = ('perform_create', 'perform_update', 'perform_destroy')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            return
+        for hook in self.write_hooks:
+            if hasattr(self, hook):
+                setattr(self, hook, queued(getattr(self, hook)))
+
 
+class MultiGetMixin:
+    multi_get_param = 'ids'
+    multi_get_field = 'pk'
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    def parse_multi_get_key(self, value):
+        try:
+            return int(value)
+        except ValueError:
+            raise ValidationError(
+                {self.multi_get_param: 'Ожидается список целых чисел.'})
+
+    def get_multi_get_keys(self):
+        raw = self.request.query_params.get(self.multi_get_param)
+        if raw is None:
+            return None
+        values = [value.strip() for value in raw.split(',') if value.strip()]
+        if len(values) > settings.MULTI_GET_MAX_KEYS:
+            raise ValidationError({self.multi_get_param: (
+                f'Не больше {settings.MULTI_GET_MAX_KEYS} значений за запрос.'
+            )})
+        return list(dict.fromkeys(
+            self.parse_multi_get_key(value) for value in values))
+
+    def list(self, request, *args, **kwargs):
+        keys = self.get_multi_get_keys()
+        if keys is None:
+            return super().list(request, *args, **kwargs)
+        found = {
+            getattr(obj, self.multi_get_field): obj
+            for obj in self.get_queryset().filter(
+                **{f'{self.multi_get_field}__in': keys})
+        }
+        serializer = self.get_serializer(
+            [found[key] for key in keys if key in found], many=True)
+        return Response({
+            'results': serializer.data,
+            'missing': [key for key in keys if key not in found],
+        })
+
+
+class ArchiveReadMixin:
+    archived_model = None
+    archive_parent_field = None
+
+    def use_archive(self):
+        return settings.ARCHIVE_ENABLED and self.request.method in SAFE_METHODS
+
+    def get_archived_queryset(self):
+        field = self.archive_parent_field
+        return self.archived_model.objects.filter(
+            **{field: self.kwargs.get(field)})
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            if not self.use_archive():
+                raise
+        self.get_queryset()
+        return hydrate([get_object_or_404(
+            self.get_archived_queryset(), pk=self.kwargs.get('pk'))])[0]
+
+    def list(self, request, *args, **kwargs):
+        if (not self.use_archive()
+                or 'ordering' in request.query_params
+                or getattr(self, 'multi_get_param', None)
+                in request.query_params):
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(ArchivePage(
+            self.get_queryset(), self.get_archived_queryset()))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class ReviewViewSet(QueuedWriteMixin, ArchiveReadMixin, SparseFieldsViewMixin,
+                    MultiGetMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [IsAdminOrMod, IsAuthenticatedOrReadOnly]
+    filter_backends = (filters.OrderingFilter,)
+    ordering_fields = ('pub_date', 'score', 'comment_count')
+    archived_model = ArchivedReview
+    archive_parent_field = 'title_id'
 
     def get_queryset(self):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        title = get_object_or_404(
+            Title, pk=self.kwargs.get('title_id'), pending_delete=False)
+        queryset = title.reviews.all()
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        if 'author' in fields:
+            queryset = queryset.select_related('author')
+        if 'text' not in fields:
+            queryset = queryset.defer('text')
+        return queryset
 
     def save_review(self, serializer):
         title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
+        title = get_object_or_404(Title, pk=title_id, pending_delete=False)
         serializer.is_valid(raise_exception=True)
         serializer.save(author=self.request.user, title=title)
 
@@ -44,39 +192,205 @@ class ReviewViewSet(viewsets.ModelViewSet):
         self.save_review(serializer)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(QueuedWriteMixin, ArchiveReadMixin,
+                     SparseFieldsViewMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = [IsAdminOrMod, IsAuthenticatedOrReadOnly]
+    archived_model = ArchivedComment
+    archive_parent_field = 'review_id'
 
     def get_review(self):
         title_id = self.kwargs.get('title_id')
         review_id = self.kwargs.get('review_id')
-        return get_object_or_404(Review, pk=review_id, title__id=title_id)
+        try:
+            return get_object_or_404(
+                Review,
+                pk=review_id,
+                title__id=title_id,
+                title__pending_delete=False
+            )
+        except Http404:
+            if not self.use_archive():
+                raise
+        get_object_or_404(Title, pk=title_id, pending_delete=False)
+        return get_object_or_404(
+            ArchivedReview, pk=review_id, title_id=title_id)
 
     def get_queryset(self):
         review = self.get_review()
-        return review.comments.all()
+        queryset = Comment.objects.filter(review_id=review.pk)
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        if 'author' in fields:
+            queryset = queryset.select_related('author')
+        if 'text' not in fields:
+            queryset = queryset.defer('text')
+        return queryset
 
     def perform_create(self, serializer):
         review = self.get_review()
         serializer.save(author=self.request.user, review=review)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).order_by('name')
+class TitleViewSet(QueuedWriteMixin, SparseFieldsViewMixin, MultiGetMixin,
+                   viewsets.ModelViewSet):
+    queryset = Title.objects.filter(pending_delete=False).order_by('name')
     serializer_class = TitleSerializer
     pagination_class = PageNumberPagination
     permission_classes = (IsAdminOrReadOnly,)
+    filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
     filterset_class = TitlesFilter
+    ordering_fields = ('name', 'year', 'review_count')
+
+    def with_histogram(self):
+        return self.action == 'retrieve' or (
+            self.action == 'list'
+            and self.request.query_params.get('histogram') in TRUE_VALUES
+        )
+
+    def get_queryset(self):
+        queryset = self.queryset
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        if 'rating' in fields:
+            queryset = queryset.annotate(rating=title_rating())
+        queryset = queryset.defer('genre_slugs')
+        if 'genre' not in fields:
+            queryset = queryset.defer('genre_cache')
+        if 'category' in fields:
+            queryset = queryset.select_related('category')
+        if 'score_histogram' in fields:
+            queryset = queryset.select_related('ranking')
+        if 'description' not in fields:
+            queryset = queryset.defer('description')
+        expand = self.get_expand()
+        if 'reviews' in expand:
+            queryset = queryset.prefetch_related(
+                self.get_reviews_prefetch(expand))
+        return queryset
+
+    def get_expand(self):
+        if self.action not in ['list', 'retrieve']:
+            return set()
+        expand = set(
+            self.request.query_params.get('expand', '').split(',')
+        ) & EXPANSIONS
+        if 'reviews.comments' in expand:
+            expand.add('reviews')
+        return expand
+
+    def get_reviews_prefetch(self, expand):
+        reviews_limit = self.get_limit(
+            'reviews_limit', settings.EXPAND_REVIEWS_LIMIT)
+        latest_reviews = Review.objects.filter(
+            title=OuterRef('title')
+        ).order_by('-pub_date').values('pk')[:reviews_limit]
+        reviews = Review.objects.filter(
+            pk__in=Subquery(latest_reviews)
+        ).select_related('author')
+        if 'reviews.comments' in expand:
+            comments_limit = self.get_limit(
+                'comments_limit', settings.EXPAND_COMMENTS_LIMIT)
+            latest_comments = Comment.objects.filter(
+                review=OuterRef('review')
+            ).order_by('-pub_date').values('pk')[:comments_limit]
+            reviews = reviews.prefetch_related(Prefetch(
+                'comments',
+                queryset=Comment.objects.filter(
+                    pk__in=Subquery(latest_comments)
+                ).select_related('author'),
+                to_attr='expanded_comments'
+            ))
+        return Prefetch(
+            'reviews', queryset=reviews, to_attr='expanded_reviews')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
+
+    def list(self, request, *args, **kwargs):
+        params = facet_params(request.query_params)
+        if params is None:
+            return super().list(request, *args, **kwargs)
+        for param in ('ordering', self.multi_get_param):
+            if param in request.query_params:
+                raise ValidationError({param: (
+                    'Нельзя сочетать с фильтрами genre__all, genre__any, '
+                    'genre__not, category__in, year__gte, year__lte и facets.'
+                )})
+        index = title_index.sync()
+        bitmap = index.resolve(**params)
+        page = self.paginate_queryset(
+            FacetPage(index, bitmap, self.get_queryset()))
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        if request.query_params.get('facets') in TRUE_VALUES:
+            response.data['facets'] = index.facets(bitmap)
+        return response
 
     def get_serializer_class(self):
+        if self.with_histogram():
+            return TitleDetailSerializer
         if self.action in ['list', 'retrieve']:
             return TitleSerializerRead
         return TitleSerializer
 
+    def perform_destroy(self, instance):
+        delete_instance(instance)
+
+    def get_limit(self, param, default, maximum=None):
+        try:
+            limit = int(self.request.query_params.get(param, default))
+        except ValueError:
+            raise ValidationError({param: 'Ожидается целое число.'})
+        return max(1, min(limit, maximum or settings.EXPAND_MAX_LIMIT))
+
+    @action(detail=False, methods=['get'])
+    def top(self, request):
+        queryset = Title.objects.filter(
+            pending_delete=False,
+            ranking__votes__gt=0
+        ).select_related(
+            'category', 'ranking'
+        ).annotate(
+            rating=title_rating()
+        ).order_by('-ranking__weighted_rating', 'name')
+        genre = request.query_params.get('genre')
+        if genre:
+            queryset = queryset.filter(genre__slug=genre)
+        category = request.query_params.get('category')
+        if category:
+            queryset = queryset.filter(category__slug=category)
+        limit = self.get_limit(
+            'limit', settings.TOP_TITLES_LIMIT, settings.TOP_TITLES_MAX_LIMIT)
+        serializer = TopTitleSerializer(queryset[:limit], many=True)
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        title = generics.get_object_or_404(
+            self.queryset.only('pk'), pk=pk)
+        queryset = Title.objects.filter(
+            similar_for__title=title,
+            pending_delete=False
+        ).select_related(
+            'category', 'ranking'
+        ).annotate(
+            rating=title_rating(),
+            similarity=F('similar_for__score')
+        ).order_by('similar_for__rank')
+        limit = self.get_limit(
+            'limit', settings.SIMILAR_TITLES_TOP_K,
+            settings.SIMILAR_TITLES_TOP_K)
+        serializer = SimilarTitleSerializer(queryset[:limit], many=True)
+        return Response(data=serializer.data, status=status.HTTP_200_OK)
+
 
-class GenreCategoryMixin(mixins.ListModelMixin,
+class GenreCategoryMixin(QueuedWriteMixin,
+                         mixins.ListModelMixin,
                          mixins.CreateModelMixin,
                          mixins.DestroyModelMixin,
                          viewsets.GenericViewSet):
@@ -93,9 +407,55 @@ class GenreViewSet(GenreCategoryMixin):
 
 
 class CategoryViewSet(GenreCategoryMixin):
-    queryset = Category.objects.all().order_by('slug')
+    queryset = Category.objects.filter(
+        pending_delete=False).order_by('slug')
     serializer_class = CategorySerializer
 
+    def perform_destroy(self, instance):
+        delete_instance(instance)
+
+
+class ChangeFeedView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get_int_param(self, param, default):
+        try:
+            return int(self.request.query_params.get(param, default))
+        except ValueError:
+            raise ValidationError({param: 'Ожидается целое число.'})
+
+    def get(self, request):
+        since = max(0, self.get_int_param('since', 0))
+        limit = max(1, min(
+            self.get_int_param('limit', settings.CHANGE_FEED_LIMIT),
+            settings.CHANGE_FEED_MAX_LIMIT
+        ))
+        changes, has_more = changes_since(since, limit)
+        return Response({
+            'results': ChangeSerializer(changes, many=True).data,
+            'next': changes[-1].id if changes else since,
+            'has_more': has_more,
+        })
+
+
+class BatchView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({
+            'responses': execute(
+                request, serializer.validated_data['requests']),
+        })
+
+
+class AdmissionStatsView(APIView):
+    permission_classes = [AdminOnly]
+
+    def get(self, request):
+        return Response(admission_stats())
+
 
 class RegisterView(APIView):
     queryset = User.objects.all()
@@ -105,16 +465,17 @@ class RegisterView(APIView):
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        queued(serializer.save)()
         user_data = serializer.validated_data
         user = get_object_or_404(User, username=user_data['username'])
         confirmation_code = RefreshToken.for_user(user).access_token
-        send_mail(
+        transaction.on_commit(partial(
+            send_mail,
             subject='Регистрация нового пользователя',
             message=f'Ваш код {confirmation_code}',
             from_email=settings.EMAIL_HOST_USER,
             recipient_list=[user_data['email']]
-        )
+        ))
         return Response(user_data, status=status.HTTP_200_OK)
 
 
@@ -143,12 +504,27 @@ class TokenView(APIView):
             return Response(data=message, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(QueuedWriteMixin, SparseFieldsViewMixin, MultiGetMixin,
+                  viewsets.ModelViewSet):
     permission_classes = [AdminOnly]
     serializer_class = UserSerializer
-    queryset = User.objects.all()
+    queryset = User.objects.filter(pending_delete=False)
     pagination_class = PageNumberPagination
     lookup_field = 'username'
+    multi_get_param = 'usernames'
+    multi_get_field = 'username'
+
+    def parse_multi_get_key(self, value):
+        return value
+
+    def perform_destroy(self, instance):
+        delete_instance(instance)
+
+    def get_queryset(self):
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return self.queryset
+        return self.queryset.only('username', *fields)
 
     @action(detail=False, methods=['get', 'post', 'put', 'patch'],
             permission_classes=[OwnerOnly], name='me')
@@ -159,5 +535,5 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response(data=serializer.data, status=status.HTTP_200_OK)
         serializer = MeSerializer(user, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+        queued(serializer.save)()
         return Response(data=serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,132 @@
+import logging
+import queue
+import threading
+import time
+from functools import partial, wraps
+
+from django.conf import settings
+from django.db import connection, transaction
+from rest_framework.exceptions import APIException
+
+logger = logging.getLogger(__name__)
+
+
+class WriteQueueTimeout(APIException):
+    status_code = 503
+    default_detail = 'Очередь записи переполнена, повторите запрос.'
+
+    def __init__(self):
+        super().__init__()
+        self.wait = settings.ADMISSION_RETRY_AFTER
+
+
+class WriteJob:
+
+    def __init__(self, func):
+        self.func = func
+        self.claim = threading.Lock()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def run(self):
+        try:
+            with transaction.atomic():
+                self.result = self.func()
+        except Exception as error:
+            self.error = error
+
+
+class GroupCommitWriter:
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.counters = {'jobs': 0, 'batches': 0, 'failed_batches': 0,
+                         'cancelled': 0}
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='group-commit-writer', daemon=True)
+                self.thread.start()
+
+    def submit(self, func):
+        job = WriteJob(func)
+        self.start()
+        self.jobs.put(job)
+        if not job.done.wait(settings.WRITE_QUEUE_TIMEOUT):
+            if job.claim.acquire(blocking=False):
+                self.count('cancelled')
+                raise WriteQueueTimeout
+            job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def count(self, counter, value=1):
+        with self.lock:
+            self.counters[counter] += value
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, queue_depth=self.jobs.qsize())
+
+    def collect(self):
+        batch = [self.jobs.get()]
+        deadline = time.monotonic() + settings.WRITE_QUEUE_INTERVAL
+        while len(batch) < settings.WRITE_QUEUE_MAX_BATCH:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.jobs.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return [job for job in batch if job.claim.acquire(blocking=False)]
+
+    def commit(self, batch):
+        try:
+            with transaction.atomic():
+                for job in batch:
+                    job.run()
+        except Exception as error:
+            logger.exception('Group commit failed')
+            self.count('failed_batches')
+            for job in batch:
+                job.result, job.error = None, error
+        finally:
+            self.count('batches')
+            self.count('jobs', len(batch))
+            for job in batch:
+                job.done.set()
+
+    def run(self):
+        while True:
+            batch = self.collect()
+            if batch:
+                self.commit(batch)
+            if self.jobs.empty():
+                connection.close_if_unusable_or_obsolete()
+
+
+writer = GroupCommitWriter()
+
+
+def queued(func):
+    if not settings.WRITE_QUEUE_ENABLED:
+        return func
+
+    @wraps(func)
+    def submit(*args, **kwargs):
+        return writer.submit(partial(func, *args, **kwargs))
+    return submit
+
+
+def enable_wal(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite' and settings.WRITE_QUEUE_ENABLED:
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute('PRAGMA synchronous=NORMAL')
@@ -16,22 +16,28 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
-    'djoser',
     'users',
-    'reviews',
+    'reviews.apps.ReviewsConfig',
+    'api.apps.ApiConfig',
     'django_filters',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'api.middleware.CompressionMiddleware',
+    'api.middleware.SnapshotMiddleware',
+    'api.middleware.CoalescingMiddleware',
+    'api.middleware.AdmissionMiddleware',
+    'api.lean.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'api.lean.CsrfViewMiddleware',
+    'api.lean.AuthenticationMiddleware',
+    'api.lean.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+LEAN_MIDDLEWARE_PREFIXES = ('/api/',)
+
 ROOT_URLCONF = 'api_yamdb.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
@@ -56,10 +62,18 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        'NAME': os.environ.get(
+            'DATABASE_PATH', os.path.join(BASE_DIR, 'db.sqlite3')),
+    },
+    'archive': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get(
+            'ARCHIVE_DATABASE', os.path.join(BASE_DIR, 'db_archive.sqlite3')),
+    },
 }
 
+DATABASE_ROUTERS = ['reviews.routers.ArchiveRouter']
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -99,6 +113,7 @@ REST_FRAMEWORK = {
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.BatchAuthentication',
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
@@ -116,3 +131,85 @@ SIMPLE_JWT = {
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 EMAIL_HOST_USER = 'api_yamdb@test_mail.ru'
+
+TOP_TITLES_MIN_VOTES = 10
+TOP_TITLES_PRIOR_MEAN = None
+TOP_TITLES_LIMIT = 10
+TOP_TITLES_MAX_LIMIT = 100
+
+EXPAND_REVIEWS_LIMIT = 5
+EXPAND_COMMENTS_LIMIT = 3
+EXPAND_MAX_LIMIT = 20
+
+MULTI_GET_MAX_KEYS = 100
+
+COMPRESSION_ENCODINGS = ('zstd', 'br', 'gzip')
+COMPRESSION_LEVELS = {'gzip': 6, 'br': 5, 'zstd': 3}
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_CACHE_BYTES = 16 * 1024 * 1024
+
+CHUNKED_DELETE_THRESHOLD = 1000
+CHUNKED_DELETE_BATCH_SIZE = 500
+CHUNKED_DELETE_PAUSE = 0.05
+CHUNKED_DELETE_ASYNC = True
+
+CATALOG_SNAPSHOTS_ENABLED = (
+    os.environ.get('CATALOG_SNAPSHOTS_ENABLED', 'False') == 'True')
+CATALOG_SNAPSHOT_DIR = os.path.join(BASE_DIR, 'catalog_snapshots')
+CATALOG_SNAPSHOT_HOST = 'localhost'
+CATALOG_SNAPSHOT_URLS = [
+    '/api/v1/titles/',
+    '/api/v1/titles/?page=2',
+    '/api/v1/genres/',
+    '/api/v1/categories/',
+]
+CATALOG_SNAPSHOT_DEBOUNCE = 2.0
+
+CHANGE_FEED_LIMIT = 100
+CHANGE_FEED_MAX_LIMIT = 1000
+CHANGE_FEED_RETENTION_DAYS = 30
+CHANGE_FEED_COMPACT_BATCH_SIZE = 1000
+
+SIMILAR_TITLES_TOP_K = 10
+SIMILAR_TITLES_CHUNK_SIZE = 1000
+
+ADMISSION_CONTROL_ENABLED = True
+ADMISSION_LIMITS = {
+    'read': {'concurrency': 32, 'queue': 64},
+    'write': {'concurrency': 4, 'queue': 16},
+    'auth': {'concurrency': 4, 'queue': 8},
+}
+ADMISSION_LOW_PRIORITY_SHARE = 0.5
+ADMISSION_MAX_WAIT = 2.0
+ADMISSION_RETRY_AFTER = 1
+
+COALESCE_ENABLED = True
+COALESCE_MAX_WAIT = 2.0
+COALESCE_SHARED_CACHE = None
+COALESCE_RESULT_TTL = 1
+COALESCE_POLL_INTERVAL = 0.01
+
+ARCHIVE_ENABLED = os.environ.get('ARCHIVE_ENABLED', 'False') == 'True'
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_BATCH_SIZE = 100
+
+COMPRESSED_TEXT_ENABLED = (
+    os.environ.get('COMPRESSED_TEXT_ENABLED', 'False') == 'True')
+COMPRESSED_TEXT_CODEC = 'zlib'
+COMPRESSED_TEXT_LEVEL = 6
+COMPRESSED_TEXT_MIN_LENGTH = 256
+COMPRESSED_TEXT_DICTIONARY_SIZE = 32 * 1024
+
+WRITE_QUEUE_ENABLED = os.environ.get('WRITE_QUEUE_ENABLED', 'False') == 'True'
+WRITE_QUEUE_INTERVAL = 0.005
+WRITE_QUEUE_MAX_BATCH = 64
+WRITE_QUEUE_TIMEOUT = 10.0
+
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.05
+BACKUP_MAX_RESTARTS = 10
+BACKUP_GZIP_LEVEL = 6
+BACKUP_ZSTD_LEVEL = 10
+
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_WORKERS = 1
@@ -1,17 +1,28 @@
 from django.contrib import admin
 
 from .models import Category, Comment, Genre, Review, Title
+from .paginators import EstimatedCountPaginator
 
 
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('id', 'text', 'author', 'score', 'pub_date')
     list_filter = ('pub_date',)
+    list_select_related = ('author',)
+    date_hierarchy = 'pub_date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    raw_id_fields = ('author', 'title')
     empty_value_display = '-пусто-'
 
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('id', 'review', 'text', 'author', 'pub_date')
     list_filter = ('pub_date',)
+    list_select_related = ('author', 'review')
+    date_hierarchy = 'pub_date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    raw_id_fields = ('author', 'review')
     empty_value_display = '-пусто-'
 
 
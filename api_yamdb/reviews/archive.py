@@ -0,0 +1,184 @@
+import heapq
+from itertools import islice
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Case, Count, Max, Min, Value, When
+
+from .changes import PARENT_FIELDS, record_changes
+from .models import (ArchivedComment, ArchivedReview, Change, Comment, Review,
+                     Title, User)
+from .routers import ARCHIVE_DB
+
+ARCHIVE_FIELDS = {
+    Review: (ArchivedReview, ('id', 'title_id', 'author_id', 'text', 'score',
+                              'pub_date', 'comment_count')),
+    Comment: (ArchivedComment, ('id', 'review_id', 'author_id', 'text',
+                                'pub_date')),
+}
+
+
+def delete_ids(model, ids, using):
+    quote = connections[using].ops.quote_name
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} '
+            f'WHERE {quote(model._meta.pk.column)} IN ({placeholders})',
+            ids)
+
+
+def restore_timestamps(model, rows, using):
+    for field in model._meta.concrete_fields:
+        if not getattr(field, 'auto_now_add', False):
+            continue
+        model.objects.using(using).filter(
+            pk__in=[row['id'] for row in rows]
+        ).update(**{field.name: Case(
+            *[When(pk=row['id'], then=Value(row[field.name]))
+              for row in rows],
+            output_field=field
+        )})
+
+
+def move_rows(model, source, target, queryset, batch_size, using):
+    fields = ARCHIVE_FIELDS[model][1]
+    parent_field = PARENT_FIELDS[model]
+    moved = 0
+    while True:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)[
+            :batch_size])
+        if not ids:
+            return moved
+        rows = list(source.objects.filter(pk__in=ids).values(*fields))
+        with transaction.atomic(using=using):
+            delete_ids(target, ids, using)
+            target.objects.using(using).bulk_create(
+                [target(**row) for row in rows])
+            restore_timestamps(target, rows, using)
+        with transaction.atomic(using=source.objects.db):
+            delete_ids(source, ids, source.objects.db)
+        record_changes(model, [
+            (row['id'], row[parent_field]) for row in rows
+        ], Change.UPDATE)
+        moved += len(ids)
+
+
+def archive_comments(before, batch_size):
+    queryset = Comment.objects.filter(
+        pub_date__lt=before, review__pub_date__lt=before)
+    return move_rows(
+        Comment, Comment, ArchivedComment, queryset, batch_size, ARCHIVE_DB)
+
+
+def archive_reviews(before, batch_size):
+    queryset = Review.objects.filter(
+        pub_date__lt=before, comments__isnull=True)
+    return move_rows(
+        Review, Review, ArchivedReview, queryset, batch_size, ARCHIVE_DB)
+
+
+def restore_reviews(queryset, batch_size):
+    return move_rows(
+        Review, ArchivedReview, Review, queryset, batch_size,
+        DEFAULT_DB_ALIAS)
+
+
+def restore_comments(queryset, batch_size):
+    return move_rows(
+        Comment, ArchivedComment, Comment, queryset, batch_size,
+        DEFAULT_DB_ALIAS)
+
+
+def purge_archived(model, pk):
+    if model is User:
+        reviews = ArchivedReview.objects.filter(author_id=pk)
+        ArchivedComment.objects.filter(author_id=pk).delete()
+    elif model is Title:
+        reviews = ArchivedReview.objects.filter(title_id=pk)
+    else:
+        ArchivedComment.objects.filter(review_id=pk).delete()
+        return
+    ArchivedComment.objects.filter(
+        review_id__in=list(reviews.values_list('pk', flat=True))).delete()
+    reviews.delete()
+
+
+def archived_histograms(title_ids=None):
+    queryset = ArchivedReview.objects.order_by()
+    if title_ids is not None:
+        queryset = queryset.filter(title_id__in=title_ids)
+    return queryset.values('title_id', 'score').annotate(count=Count('id'))
+
+
+def archived_counts(model, ids=None):
+    if model is Title:
+        queryset, field = ArchivedReview.objects.all(), 'title_id'
+    else:
+        queryset, field = ArchivedComment.objects.all(), 'review_id'
+    if ids is not None:
+        queryset = queryset.filter(**{f'{field}__in': ids})
+    return dict(queryset.order_by().values_list(
+        field).annotate(count=Count('id')))
+
+
+def hydrate(rows):
+    users = User.objects.in_bulk({row.author_id for row in rows})
+    for row in rows:
+        row.author = users.get(row.author_id)
+        if isinstance(row, ArchivedReview):
+            row.title = Title(pk=row.title_id)
+    return rows
+
+
+def pub_date(row):
+    return row.pub_date
+
+
+class ArchivePage:
+
+    def __init__(self, hot, archived):
+        hot = hot.order_by('-pub_date')
+        archived = archived.order_by('-pub_date')
+        newest_archived = archived.aggregate(
+            newest=Max('pub_date'))['newest']
+        oldest_hot = hot.aggregate(oldest=Min('pub_date'))['oldest']
+        if newest_archived is None:
+            self.head, self.middle_hot = hot, hot.none()
+        else:
+            self.head = hot.filter(pub_date__gt=newest_archived)
+            self.middle_hot = hot.filter(pub_date__lte=newest_archived)
+        if oldest_hot is None:
+            self.tail, self.middle_archived = archived, archived.none()
+        else:
+            self.tail = archived.filter(pub_date__lt=oldest_hot)
+            self.middle_archived = archived.filter(pub_date__gte=oldest_hot)
+        self.head_count = self.head.count()
+        self.tail_count = self.tail.count()
+        self.length = hot.count() + archived.count()
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start = item.start or 0
+        stop = self.length if item.stop is None else min(
+            item.stop, self.length)
+        middle_start = self.head_count
+        tail_start = self.length - self.tail_count
+        rows = []
+        if start < middle_start:
+            rows += list(self.head[start:min(stop, middle_start)])
+        if start < tail_start and stop > middle_start:
+            local_stop = min(stop, tail_start) - middle_start
+            merged = heapq.merge(
+                self.middle_hot[:local_stop],
+                hydrate(list(self.middle_archived[:local_stop])),
+                key=pub_date, reverse=True)
+            rows += list(islice(
+                merged, max(start - middle_start, 0), local_stop))
+        if stop > tail_start:
+            rows += hydrate(list(self.tail[
+                max(start, tail_start) - tail_start:stop - tail_start]))
+        return rows
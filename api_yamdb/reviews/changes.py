@@ -0,0 +1,70 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Max, Min, OuterRef, Q
+from django.dispatch import Signal
+
+from .models import Category, Change, Comment, Genre, Review, Title
+
+TRACKED_MODELS = (Category, Genre, Title, Review, Comment)
+PARENT_FIELDS = {Review: 'title_id', Comment: 'review_id'}
+
+changes_recorded = Signal()
+
+
+def change_for(instance, action):
+    parent_field = PARENT_FIELDS.get(type(instance))
+    return Change(
+        model=instance._meta.model_name,
+        object_id=instance.pk,
+        parent_id=getattr(instance, parent_field) if parent_field else None,
+        action=action
+    )
+
+
+def record_change(instance, action):
+    change_for(instance, action).save()
+
+
+def record_changes(model, rows, action):
+    changes = [
+        Change(model=model._meta.model_name, object_id=object_id,
+               parent_id=parent_id, action=action)
+        for object_id, parent_id in rows
+    ]
+    if changes:
+        Change.objects.bulk_create(changes)
+        changes_recorded.send(sender=model)
+
+
+def record_title_updates(title_ids):
+    record_changes(Title, ((pk, None) for pk in title_ids), Change.UPDATE)
+
+
+def changes_since(since, limit):
+    changes = list(Change.objects.filter(id__gt=since)[:limit + 1])
+    return changes[:limit], len(changes) > limit
+
+
+def compact(before, drop_tombstones=False, batch_size=None):
+    if batch_size is None:
+        batch_size = settings.CHANGE_FEED_COMPACT_BATCH_SIZE
+    bounds = Change.objects.filter(created__lt=before).aggregate(
+        first=Min('id'), last=Max('id'))
+    if bounds['last'] is None:
+        return 0
+    newer = Change.objects.filter(
+        model=OuterRef('model'), object_id=OuterRef('object_id'),
+        id__gt=OuterRef('id'))
+    expired = Q(superseded=True)
+    if drop_tombstones:
+        expired |= Q(action=Change.DELETE)
+    deleted = 0
+    for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+        with transaction.atomic():
+            ids = list(Change.objects.filter(
+                id__gte=start, id__lt=start + batch_size, created__lt=before
+            ).annotate(superseded=Exists(newer)).filter(
+                expired).values_list('id', flat=True))
+            if ids:
+                deleted += Change.objects.filter(id__in=ids).delete()[0]
+    return deleted
@@ -0,0 +1,172 @@
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+
+from .archive import archived_counts
+from .changes import record_title_updates
+from .models import Category, Comment, Review, Title, User
+from .ranking import refresh_title
+
+logger = logging.getLogger(__name__)
+
+jobs = queue.Queue()
+worker = None
+worker_lock = threading.Lock()
+state = threading.local()
+
+
+@contextmanager
+def deferred_counters():
+    state.deferred = True
+    try:
+        yield
+    finally:
+        state.deferred = False
+
+
+def counters_deferred():
+    return getattr(state, 'deferred', False)
+
+
+def related_rows(instance):
+    if isinstance(instance, Title):
+        return instance.reviews.count()
+    if isinstance(instance, User):
+        return instance.reviews.count() + instance.comments.count()
+    if isinstance(instance, Category):
+        return instance.titles.count()
+    return 0
+
+
+def delete_instance(instance):
+    if related_rows(instance) < settings.CHUNKED_DELETE_THRESHOLD:
+        instance.delete()
+        return
+    changes = {'pending_delete': True}
+    if isinstance(instance, User):
+        changes['is_active'] = False
+    for field, value in changes.items():
+        setattr(instance, field, value)
+    instance.save(update_fields=list(changes))
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(lambda: schedule(model, pk))
+
+
+def schedule(model, pk):
+    if not settings.CHUNKED_DELETE_ASYNC:
+        run_chunked_delete(model, pk)
+        return
+    jobs.put((model, pk))
+    start_worker()
+
+
+def start_worker():
+    global worker
+    with worker_lock:
+        if worker is None or not worker.is_alive():
+            worker = threading.Thread(
+                target=run_worker, name='chunked-delete', daemon=True)
+            worker.start()
+
+
+def run_worker():
+    while True:
+        model, pk = jobs.get()
+        try:
+            run_chunked_delete(model, pk)
+        except Exception:
+            logger.exception(
+                'Chunked delete of %s %s failed', model.__name__, pk)
+        finally:
+            connection.close()
+            jobs.task_done()
+
+
+def batches(queryset):
+    queryset = queryset.order_by()
+    while True:
+        ids = list(queryset.values_list(
+            'pk', flat=True)[:settings.CHUNKED_DELETE_BATCH_SIZE])
+        if not ids:
+            return
+        yield queryset.model.objects.filter(pk__in=ids)
+        time.sleep(settings.CHUNKED_DELETE_PAUSE)
+
+
+def delete_in_batches(queryset, parent_field=None):
+    parents = set()
+    for batch in batches(queryset):
+        with transaction.atomic():
+            if parent_field is not None:
+                parents.update(batch.values_list(parent_field, flat=True))
+            batch.delete()
+    return parents
+
+
+def clear_category(pk):
+    for batch in batches(Title.objects.filter(category_id=pk)):
+        with transaction.atomic():
+            title_ids = list(batch.values_list('pk', flat=True))
+            batch.update(category=None)
+            record_title_updates(title_ids)
+
+
+def refresh_counters(title_ids=(), review_ids=()):
+    checks = (
+        (Title, 'review_count', 'reviews', sorted(title_ids)),
+        (Review, 'comment_count', 'comments', sorted(review_ids)),
+    )
+    size = settings.CHUNKED_DELETE_BATCH_SIZE
+    for model, field, relation, ids in checks:
+        for start in range(0, len(ids), size):
+            batch = ids[start:start + size]
+            archived = (
+                archived_counts(model, batch) if settings.ARCHIVE_ENABLED
+                else {})
+            rows = model.objects.filter(
+                pk__in=batch
+            ).order_by().annotate(
+                actual=Count(relation)
+            ).values_list('pk', 'actual')
+            with transaction.atomic():
+                for pk, actual in rows:
+                    model.objects.filter(pk=pk).update(
+                        **{field: actual + archived.get(pk, 0)})
+                    if model is Title:
+                        refresh_title(pk)
+
+
+def run_chunked_delete(model, pk):
+    title_ids, review_ids = set(), set()
+    with deferred_counters():
+        if model is Title:
+            delete_in_batches(Comment.objects.filter(review__title_id=pk))
+            delete_in_batches(Review.objects.filter(title_id=pk))
+            delete_in_batches(Title.genre.through.objects.filter(title_id=pk))
+        elif model is User:
+            review_ids = delete_in_batches(
+                Comment.objects.filter(author_id=pk), 'review_id')
+            delete_in_batches(Comment.objects.filter(review__author_id=pk))
+            title_ids = delete_in_batches(
+                Review.objects.filter(author_id=pk), 'title_id')
+        elif model is Category:
+            clear_category(pk)
+        with transaction.atomic():
+            model.objects.filter(pk=pk).delete()
+    refresh_counters(title_ids, review_ids)
+
+
+def resume_pending():
+    resumed = 0
+    for model in (Title, User, Category):
+        for pk in model.objects.filter(
+                pending_delete=True).values_list('pk', flat=True):
+            run_chunked_delete(model, pk)
+            resumed += 1
+    return resumed
@@ -0,0 +1,313 @@
+import bisect
+import json
+import threading
+from collections import defaultdict
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+from django.db.models import Max
+
+from .models import Category, Change, Genre, Title
+
+FACET_MODELS = ('title', 'genre', 'category')
+INCREMENTAL_LIMIT = 300
+CHUNK_BYTES = 512
+ASCII_LOWER = str.maketrans(
+    'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+
+def fold(value):
+    return value.translate(ASCII_LOWER)
+
+
+def popcount(bitmap):
+    return bin(bitmap).count('1')
+
+
+def union(bitmaps):
+    return reduce(or_, bitmaps, 0)
+
+
+def from_positions(positions, size):
+    data = bytearray((size + 7) // 8)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, 'little')
+
+
+def insert_bit(bitmap, position):
+    low = bitmap & ((1 << position) - 1)
+    return low | bitmap >> position << position + 1
+
+
+def remove_bit(bitmap, position):
+    low = bitmap & ((1 << position) - 1)
+    return low | bitmap >> position + 1 << position
+
+
+def set_positions(bitmap, skip):
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for offset in range(0, len(data), CHUNK_BYTES):
+        chunk = int.from_bytes(data[offset:offset + CHUNK_BYTES], 'little')
+        count = popcount(chunk)
+        if skip >= count:
+            skip -= count
+            continue
+        while chunk:
+            low = chunk & -chunk
+            chunk ^= low
+            if skip:
+                skip -= 1
+                continue
+            yield offset * 8 + low.bit_length() - 1
+
+
+class Facet:
+
+    def __init__(self, slugs=()):
+        self.bitmaps = defaultdict(int)
+        self.slugs = {}
+        self.ids = {}
+        for pk, slug in slugs:
+            self.rename(pk, slug)
+
+    def rename(self, pk, slug):
+        self.ids.pop(self.slugs.get(pk), None)
+        self.slugs[pk] = slug
+        self.ids[slug] = pk
+
+    def drop(self, pk):
+        self.bitmaps.pop(pk, None)
+        self.ids.pop(self.slugs.pop(pk, None), None)
+
+    def get(self, slug):
+        return self.bitmaps.get(self.ids.get(slug), 0)
+
+    def matching(self, needle):
+        needle = fold(needle)
+        return union(
+            bitmap for pk, bitmap in self.bitmaps.items()
+            if needle in fold(self.slugs.get(pk, ''))
+        )
+
+    def counts(self, bitmap):
+        counts = (
+            (self.slugs[pk], popcount(bitmap & bits))
+            for pk, bits in self.bitmaps.items() if pk in self.slugs
+        )
+        return {slug: count for slug, count in sorted(counts) if count}
+
+
+class FacetIndex:
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.built = False
+        self.cursor = 0
+        self.reset()
+
+    def reset(self, genres=(), categories=()):
+        self.all = 0
+        self.genres = Facet(genres)
+        self.categories = Facet(categories)
+        self.years = defaultdict(int)
+        self.keys = {}
+        self.order = []
+        self.folded = []
+
+    def rows(self, ids=None):
+        queryset = Title.objects.filter(pending_delete=False)
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        return queryset.values_list(
+            'pk', 'name', 'year', 'category_id', 'genre_cache')
+
+    def bitmap_groups(self):
+        return self.genres.bitmaps, self.categories.bitmaps, self.years
+
+    def shift(self, position, operation):
+        self.all = operation(self.all, position)
+        for bitmaps in self.bitmap_groups():
+            for key, bitmap in bitmaps.items():
+                bitmaps[key] = operation(bitmap, position)
+
+    def add(self, pk, name, year, category, genre_cache):
+        genres = tuple(genre for genre, _, _ in json.loads(genre_cache))
+        position = bisect.bisect_left(self.order, (name, pk))
+        self.order.insert(position, (name, pk))
+        self.folded.insert(position, fold(name))
+        self.shift(position, insert_bit)
+        bit = 1 << position
+        self.all |= bit
+        for genre in genres:
+            self.genres.bitmaps[genre] |= bit
+        if category is not None:
+            self.categories.bitmaps[category] |= bit
+        self.years[year] |= bit
+        self.keys[pk] = (name, year, category, genres)
+
+    def discard(self, pk):
+        if pk not in self.keys:
+            return
+        name, year, category, genres = self.keys.pop(pk)
+        position = bisect.bisect_left(self.order, (name, pk))
+        del self.order[position]
+        del self.folded[position]
+        self.shift(position, remove_bit)
+        for bitmaps, key in [(self.genres.bitmaps, genre)
+                             for genre in genres] + [
+                (self.categories.bitmaps, category), (self.years, year)]:
+            if key in bitmaps and not bitmaps[key]:
+                del bitmaps[key]
+
+    def rebuild(self):
+        with self.lock:
+            cursor = Change.objects.aggregate(cursor=Max('id'))['cursor']
+            self.reset(
+                Genre.objects.values_list('pk', 'slug'),
+                Category.objects.values_list('pk', 'slug'),
+            )
+            rows = sorted(self.rows(), key=lambda row: (row[1], row[0]))
+            positions = (defaultdict(list), defaultdict(list),
+                         defaultdict(list))
+            for position, (pk, name, year, category, genre_cache) in (
+                    enumerate(rows)):
+                genres = tuple(
+                    genre for genre, _, _ in json.loads(genre_cache))
+                for genre in genres:
+                    positions[0][genre].append(position)
+                if category is not None:
+                    positions[1][category].append(position)
+                positions[2][year].append(position)
+                self.keys[pk] = (name, year, category, genres)
+                self.order.append((name, pk))
+                self.folded.append(fold(name))
+            size = len(rows)
+            self.all = (1 << size) - 1
+            for bitmaps, group in zip(self.bitmap_groups(), positions):
+                for key, members in group.items():
+                    bitmaps[key] = from_positions(members, size)
+            self.cursor = cursor or 0
+            self.built = True
+
+    def sync(self):
+        with self.lock:
+            if not self.built:
+                self.rebuild()
+                return self
+            latest = Change.objects.aggregate(
+                cursor=Max('id'))['cursor'] or 0
+            if latest < self.cursor:
+                self.rebuild()
+                return self
+            if latest == self.cursor:
+                return self
+            changes = Change.objects.filter(
+                id__gt=self.cursor, id__lte=latest, model__in=FACET_MODELS
+            ).values_list('model', 'object_id', 'action')
+            titles = set()
+            renamed = {'genre': set(), 'category': set()}
+            for model, object_id, action in changes:
+                if model == 'title':
+                    titles.add(object_id)
+                elif action == Change.DELETE:
+                    self.facet(model).drop(object_id)
+                    renamed[model].discard(object_id)
+                else:
+                    renamed[model].add(object_id)
+            if len(titles) > INCREMENTAL_LIMIT:
+                self.rebuild()
+                return self
+            self.rename(renamed)
+            for pk in titles:
+                self.discard(pk)
+            for row in self.rows(titles):
+                self.add(*row)
+            self.cursor = latest
+        return self
+
+    def facet(self, model):
+        return self.genres if model == 'genre' else self.categories
+
+    def rename(self, renamed):
+        for model, source in (('genre', Genre), ('category', Category)):
+            if not renamed[model]:
+                continue
+            for pk, slug in source.objects.filter(
+                    pk__in=renamed[model]).values_list('pk', 'slug'):
+                self.facet(model).rename(pk, slug)
+
+    def resolve(self, genre_all=(), genre_any=(), genre_not=(),
+                genre_contains=None, categories=(), category_contains=None,
+                year_min=None, year_max=None, name_contains=None):
+        with self.lock:
+            bitmap = self.all
+            for slug in genre_all:
+                bitmap &= self.genres.get(slug)
+            if genre_any:
+                bitmap &= union(self.genres.get(slug) for slug in genre_any)
+            for slug in genre_not:
+                bitmap &= ~self.genres.get(slug)
+            if genre_contains:
+                bitmap &= self.genres.matching(genre_contains)
+            if categories:
+                bitmap &= union(
+                    self.categories.get(slug) for slug in categories)
+            if category_contains:
+                bitmap &= self.categories.matching(category_contains)
+            if year_min is not None or year_max is not None:
+                bitmap &= union(
+                    bits for year, bits in self.years.items()
+                    if (year_min is None or year >= year_min)
+                    and (year_max is None or year <= year_max)
+                )
+            if name_contains:
+                needle = fold(name_contains)
+                bitmap &= from_positions((
+                    position for position, name in enumerate(self.folded)
+                    if needle in name
+                ), len(self.folded))
+            return bitmap
+
+    def facets(self, bitmap):
+        with self.lock:
+            return {
+                'genre': self.genres.counts(bitmap),
+                'category': self.categories.counts(bitmap),
+                'year': {
+                    year: count for year, count in (
+                        (year, popcount(bitmap & bits))
+                        for year, bits in sorted(self.years.items())
+                    ) if count
+                },
+            }
+
+    def ordered_ids(self, bitmap, start, stop):
+        with self.lock:
+            positions = set_positions(bitmap, start)
+            if stop is not None:
+                positions = islice(positions, max(stop - start, 0))
+            return [self.order[position][1] for position in positions]
+
+
+class FacetPage:
+
+    def __init__(self, index, bitmap, queryset):
+        self.index = index
+        self.bitmap = bitmap
+        self.queryset = queryset
+        self.length = popcount(bitmap)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        ids = self.index.ordered_ids(self.bitmap, item.start or 0, item.stop)
+        titles = self.queryset.in_bulk(ids)
+        return [titles[pk] for pk in ids if pk in titles]
+
+
+title_index = FacetIndex()
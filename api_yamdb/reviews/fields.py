@@ -0,0 +1,136 @@
+import re
+import struct
+import zlib
+from collections import Counter
+
+from django.conf import settings
+from django.db import models
+from django.utils.functional import SimpleLazyObject
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CODECS = {'zlib': 1, 'zstd': 2}
+HEADER = struct.Struct('>BH')
+WORDS = re.compile(r'\w{4,}')
+
+dictionaries = {}
+current = {}
+
+
+def get_dictionary(dictionary_id):
+    if not dictionary_id:
+        return b''
+    if dictionary_id not in dictionaries:
+        from .models import CompressionDictionary
+
+        dictionaries[dictionary_id] = bytes(
+            CompressionDictionary.objects.get(pk=dictionary_id).data)
+    return dictionaries[dictionary_id]
+
+
+def current_dictionary():
+    codec = settings.COMPRESSED_TEXT_CODEC
+    if codec not in current:
+        from .models import CompressionDictionary
+
+        latest = CompressionDictionary.objects.filter(codec=codec).first()
+        current[codec] = latest.pk if latest else 0
+    return current[codec], get_dictionary(current[codec])
+
+
+def reset_dictionary_cache():
+    current.clear()
+
+
+def train_dictionary(samples, size, codec):
+    if codec == 'zstd':
+        return zstandard.train_dictionary(
+            size, [sample.encode() for sample in samples]).as_bytes()
+    counter = Counter(
+        word for sample in samples for word in WORDS.findall(sample))
+    dictionary = b''
+    for word, _ in counter.most_common():
+        chunk = word.encode() + b' '
+        if len(dictionary) + len(chunk) > size:
+            break
+        dictionary = chunk + dictionary
+    return dictionary
+
+
+def compress_text(text):
+    codec = settings.COMPRESSED_TEXT_CODEC
+    level = settings.COMPRESSED_TEXT_LEVEL
+    dictionary_id, dictionary = current_dictionary()
+    data = text.encode()
+    if codec == 'zstd':
+        compressor = zstandard.ZstdCompressor(
+            level=level,
+            dict_data=zstandard.ZstdCompressionDict(dictionary)
+            if dictionary else None
+        )
+        body = compressor.compress(data)
+    else:
+        compressor = (
+            zlib.compressobj(level, zdict=dictionary)
+            if dictionary else zlib.compressobj(level)
+        )
+        body = compressor.compress(data) + compressor.flush()
+    return HEADER.pack(CODECS[codec], dictionary_id) + body
+
+
+def decompress_text(blob):
+    codec, dictionary_id = HEADER.unpack_from(blob)
+    body = blob[HEADER.size:]
+    dictionary = get_dictionary(dictionary_id)
+    if codec == CODECS['zstd']:
+        decompressor = zstandard.ZstdDecompressor(
+            dict_data=zstandard.ZstdCompressionDict(dictionary)
+            if dictionary else None
+        )
+        return decompressor.decompress(body).decode()
+    decompressor = (
+        zlib.decompressobj(zdict=dictionary)
+        if dictionary else zlib.decompressobj()
+    )
+    return (decompressor.decompress(body) + decompressor.flush()).decode()
+
+
+class CompressedText(SimpleLazyObject):
+
+    def __init__(self, blob):
+        self.__dict__['blob'] = blob
+        super().__init__(lambda: decompress_text(blob))
+
+
+class CompressedTextField(models.TextField):
+
+    def compression_active(self, connection):
+        return (settings.COMPRESSED_TEXT_ENABLED
+                and connection.vendor == 'sqlite')
+
+    def from_db_value(self, value, expression, connection):
+        if isinstance(value, (bytes, memoryview)):
+            return CompressedText(bytes(value))
+        return value
+
+    def to_python(self, value):
+        if type(value) is CompressedText:
+            return str(value)
+        return super().to_python(value)
+
+    def get_db_prep_save(self, value, connection):
+        if type(value) is CompressedText:
+            if self.compression_active(connection):
+                return value.blob
+            return str(value)
+        value = super().get_db_prep_save(value, connection)
+        if (value is None or not self.compression_active(connection)
+                or len(value) < settings.COMPRESSED_TEXT_MIN_LENGTH):
+            return value
+        blob = compress_text(value)
+        if len(blob) >= len(value.encode()):
+            return value
+        return blob
@@ -0,0 +1,37 @@
+import json
+
+from .models import Title
+
+BATCH_SIZE = 500
+
+
+def encode_genres(genres):
+    return (
+        json.dumps(genres, ensure_ascii=False, separators=(',', ':')),
+        ',' + ''.join(f'{slug},' for _, _, slug in genres),
+    )
+
+
+def refresh_genre_cache(title_ids):
+    title_ids = list(title_ids)
+    for start in range(0, len(title_ids), BATCH_SIZE):
+        batch = title_ids[start:start + BATCH_SIZE]
+        genres = {pk: [] for pk in batch}
+        rows = Title.genre.through.objects.filter(
+            title_id__in=batch
+        ).order_by(
+            'genre__name', 'genre_id'
+        ).values_list('title_id', 'genre_id', 'genre__name', 'genre__slug')
+        for title_id, *genre in rows:
+            genres[title_id].append(genre)
+        titles = []
+        for pk, title_genres in genres.items():
+            genre_cache, genre_slugs = encode_genres(title_genres)
+            titles.append(Title(
+                pk=pk, genre_cache=genre_cache, genre_slugs=genre_slugs))
+        Title.objects.bulk_update(titles, ('genre_cache', 'genre_slugs'))
+
+
+def titles_with_genre(genre):
+    return Title.genre.through.objects.filter(
+        genre_id=genre.pk).values_list('title_id', flat=True)
@@ -0,0 +1,36 @@
+import datetime as dt
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from reviews.archive import archive_comments, archive_reviews
+
+
+class Command(BaseCommand):
+    help = ('Переносит старые комментарии (и, по желанию, отзывы) '
+            'в архивную базу пачками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+            help='Архивировать записи старше указанного числа дней.')
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE)
+        parser.add_argument(
+            '--reviews', action='store_true',
+            help='Архивировать и старые отзывы без комментариев в основной '
+                 'базе.')
+
+    def handle(self, *args, **options):
+        if not settings.ARCHIVE_ENABLED:
+            raise CommandError(
+                'Архив выключен: задайте ARCHIVE_ENABLED=True, иначе '
+                'перенесённые записи пропадут из API.')
+        before = timezone.now() - dt.timedelta(days=options['days'])
+        comments = archive_comments(before, options['batch_size'])
+        self.stdout.write(f'Комментариев в архиве: +{comments}')
+        if options['reviews']:
+            reviews = archive_reviews(before, options['batch_size'])
+            self.stdout.write(f'Отзывов в архиве: +{reviews}')
+        self.stdout.write(self.style.SUCCESS('Готово.'))
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F
+
+from reviews.archive import archived_counts
+from reviews.models import Review, Title
+
+
+class Command(BaseCommand):
+    help = ('Сверяет счётчики review_count и comment_count с таблицами '
+            'отзывов и комментариев.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Исправить расхождения.')
+
+    def handle(self, *args, **options):
+        checks = (
+            (Title, 'review_count', 'reviews'),
+            (Review, 'comment_count', 'comments'),
+        )
+        for model, field, relation in checks:
+            rows = model.objects.order_by().annotate(actual=Count(relation))
+            if settings.ARCHIVE_ENABLED:
+                archived = archived_counts(model)
+                broken = [
+                    (pk, actual + archived.get(pk, 0))
+                    for pk, current, actual in rows.values_list(
+                        'pk', field, 'actual')
+                    if current != actual + archived.get(pk, 0)
+                ]
+            else:
+                broken = list(rows.exclude(
+                    **{field: F('actual')}).values_list('pk', 'actual'))
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}.{field}: '
+                f'расхождений {len(broken)}'
+            )
+            if options['fix'] and broken:
+                with transaction.atomic():
+                    for pk, actual in broken:
+                        model.objects.filter(pk=pk).update(**{field: actual})
+                self.stdout.write(self.style.SUCCESS('Исправлено.'))
@@ -0,0 +1,26 @@
+import datetime as dt
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from reviews.changes import compact
+
+
+class Command(BaseCommand):
+    help = ('Сжимает журнал изменений: для записей старше срока хранения '
+            'оставляет только последнее событие по каждому объекту.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.CHANGE_FEED_RETENTION_DAYS,
+            help='Срок хранения полной истории в днях.')
+        parser.add_argument(
+            '--drop-tombstones', action='store_true',
+            help='Удалить и устаревшие события удаления.')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - dt.timedelta(days=options['days'])
+        deleted = compact(before, drop_tombstones=options['drop_tombstones'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Удалено записей журнала: {deleted}'))
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reviews.fields import CompressedText
+from reviews.models import (ArchivedComment, ArchivedReview, Comment,
+                            Review)
+
+
+def stored_size(value):
+    if type(value) is CompressedText:
+        return len(value.blob)
+    return len(value.encode())
+
+
+class Command(BaseCommand):
+    help = ('Пересохраняет тексты отзывов и комментариев пачками: сжимает '
+            'их при COMPRESSED_TEXT_ENABLED=True и распаковывает иначе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--archive', action='store_true',
+            help='Обработать и записи архивной базы.')
+
+    def handle(self, *args, **options):
+        models = [Review, Comment]
+        if options['archive']:
+            models += [ArchivedReview, ArchivedComment]
+        compress = settings.COMPRESSED_TEXT_ENABLED
+        for model in models:
+            converted = before = after = 0
+            last = 0
+            while True:
+                rows = list(model.objects.filter(pk__gt=last).order_by(
+                    'pk').only('pk', 'text')[:options['batch_size']])
+                if not rows:
+                    break
+                last = rows[-1].pk
+                pending = [
+                    row for row in rows
+                    if (type(row.text) is CompressedText) != compress
+                ]
+                before += sum(stored_size(row.text) for row in rows)
+                for row in pending:
+                    row.text = str(row.text)
+                model.objects.bulk_update(pending, ['text'])
+                converted += len(pending)
+                after += sum(
+                    stored_size(text) for text in model.objects.filter(
+                        pk__in=[row.pk for row in rows]
+                    ).values_list('text', flat=True)
+                )
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: пересохранено '
+                f'{converted}, {before} -> {after} байт'
+            )
+        self.stdout.write(self.style.SUCCESS('Готово.'))
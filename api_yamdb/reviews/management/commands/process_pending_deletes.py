@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from reviews.deletion import resume_pending
+
+
+class Command(BaseCommand):
+    help = ('Дочищает произведения, пользователей и категории, '
+            'помеченные на пакетное удаление.')
+
+    def handle(self, *args, **options):
+        count = resume_pending()
+        self.stdout.write(self.style.SUCCESS(f'Удалено объектов: {count}'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from reviews.genre_cache import refresh_genre_cache
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает денормализованные жанры произведений.'
+
+    def handle(self, *args, **options):
+        title_ids = list(Title.objects.values_list('pk', flat=True))
+        refresh_genre_cache(title_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено произведений: {len(title_ids)}'))
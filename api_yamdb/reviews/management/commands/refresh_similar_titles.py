@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews import similarity
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает похожие произведения по косинусной близости '
+            'оценок пользователей для /titles/{id}/similar/.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k', type=int, default=settings.SIMILAR_TITLES_TOP_K)
+        parser.add_argument(
+            '--chunk-size', type=int,
+            default=settings.SIMILAR_TITLES_CHUNK_SIZE)
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Пересчитать только произведения с изменившимися отзывами.')
+
+    def handle(self, *args, **options):
+        if similarity.np is None:
+            raise CommandError(
+                'Для расчёта нужны numpy и scipy: pip install numpy scipy')
+        title_ids = None
+        if options['incremental']:
+            title_ids = similarity.stale_titles()
+        count = similarity.refresh_similar(
+            options['top_k'], options['chunk_size'], title_ids)
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено произведений: {count}'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from reviews.ranking import backfill_missing, refresh_all
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинг произведений для /titles/top/ '
+            'и гистограммы оценок.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--missing', action='store_true',
+            help='Только создать рейтинг для произведений без него.')
+
+    def handle(self, *args, **options):
+        if options['missing']:
+            count = backfill_missing(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Создано рейтингов: {count}'))
+            return
+        count, mean = refresh_all(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено произведений: {count}, априорная оценка: {mean:.2f}'
+        ))
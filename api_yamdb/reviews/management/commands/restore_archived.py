@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reviews.archive import restore_comments, restore_reviews
+from reviews.models import ArchivedComment, ArchivedReview, Review
+
+
+class Command(BaseCommand):
+    help = 'Возвращает записи из архивной базы в основную.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--title', type=int,
+            help='Вернуть только отзывы и комментарии произведения.')
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ARCHIVE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        reviews = ArchivedReview.objects.all()
+        comments = ArchivedComment.objects.all()
+        if options['title'] is not None:
+            reviews = reviews.filter(title_id=options['title'])
+            review_ids = list(reviews.values_list('pk', flat=True)) + list(
+                Review.objects.filter(
+                    title_id=options['title']).values_list('pk', flat=True))
+            comments = comments.filter(review_id__in=review_ids)
+        restored_reviews = restore_reviews(reviews, options['batch_size'])
+        restored_comments = restore_comments(comments, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Возвращено отзывов: {restored_reviews}, '
+            f'комментариев: {restored_comments}'
+        ))
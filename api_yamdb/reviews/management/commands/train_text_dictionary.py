@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.fields import reset_dictionary_cache, train_dictionary, zstandard
+from reviews.models import Comment, CompressionDictionary, Review
+
+
+class Command(BaseCommand):
+    help = ('Обучает общий словарь сжатия на выборке текстов отзывов '
+            'и комментариев.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sample', type=int, default=5000)
+        parser.add_argument(
+            '--size', type=int,
+            default=settings.COMPRESSED_TEXT_DICTIONARY_SIZE)
+
+    def handle(self, *args, **options):
+        codec = settings.COMPRESSED_TEXT_CODEC
+        if codec == 'zstd' and zstandard is None:
+            raise CommandError(
+                'Для словаря zstd нужен пакет zstandard: '
+                'pip install zstandard')
+        samples = [
+            str(text) for model in (Review, Comment)
+            for text in model.objects.order_by('-pk').values_list(
+                'text', flat=True)[:options['sample']]
+        ]
+        if not samples:
+            raise CommandError('Нет текстов для обучения словаря.')
+        dictionary = CompressionDictionary.objects.create(
+            codec=codec,
+            data=train_dictionary(samples, options['size'], codec)
+        )
+        reset_dictionary_cache()
+        self.stdout.write(self.style.SUCCESS(
+            f'Словарь {dictionary}: {len(dictionary.data)} байт, '
+            f'выборка {len(samples)} текстов'
+        ))
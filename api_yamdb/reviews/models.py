@@ -1,11 +1,40 @@
+import json
+
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
+from .fields import CompressedTextField
 from .validators import validate_year
 from users.models import User
 
+SCORES = range(1, 11)
+
+
+class DenormalizedFieldsMixin:
+    denormalized_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (not self._state.adding and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred
+                and field.name not in self.denormalized_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class AtomicSaveMixin:
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
 
-class Category(models.Model):
+class Category(AtomicSaveMixin, models.Model):
     name = models.CharField(
         max_length=256,
         verbose_name='category'
@@ -15,6 +44,11 @@ class Category(models.Model):
         unique=True,
         verbose_name='slug'
     )
+    pending_delete = models.BooleanField(
+        default=False,
+        db_index=True,
+        verbose_name='pending delete'
+    )
 
     class Meta:
         verbose_name = 'category'
@@ -25,7 +59,7 @@ class Category(models.Model):
         return self.name
 
 
-class Genre(models.Model):
+class Genre(AtomicSaveMixin, models.Model):
     name = models.CharField(
         max_length=256,
         verbose_name='genre'
@@ -45,7 +79,7 @@ class Genre(models.Model):
         return self.slug
 
 
-class Title(models.Model):
+class Title(AtomicSaveMixin, DenormalizedFieldsMixin, models.Model):
     name = models.CharField(
         max_length=100,
         db_index=True,
@@ -69,18 +103,56 @@ class Title(models.Model):
         null=True,
         verbose_name='category'
     )
+    pending_delete = models.BooleanField(
+        default=False,
+        db_index=True,
+        verbose_name='pending delete'
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name='review count'
+    )
+    genre_cache = models.TextField(
+        default='[]',
+        editable=False,
+        verbose_name='genres (denormalized)'
+    )
+    genre_slugs = models.TextField(
+        default=',',
+        editable=False,
+        verbose_name='genre slugs (denormalized)'
+    )
+
+    denormalized_fields = ('review_count', 'genre_cache', 'genre_slugs')
 
     class Meta:
         verbose_name = 'title'
         verbose_name_plural = 'titles'
         ordering = ['name']
+        indexes = (
+            models.Index(
+                fields=('category', 'year', 'name'),
+                name='title_category_year_name_idx'),
+            models.Index(
+                fields=('year', 'name'),
+                name='title_year_name_idx'),
+        )
 
     def __str__(self):
         return self.name
 
+    @property
+    def cached_genres(self):
+        return [
+            {'name': name, 'slug': slug}
+            for _, name, slug in json.loads(self.genre_cache)
+        ]
 
-class Review(models.Model):
-    text = models.TextField()
+
+class Review(AtomicSaveMixin, DenormalizedFieldsMixin, models.Model):
+    text = CompressedTextField()
     pub_date = models.DateTimeField(
         auto_now_add=True,
     )
@@ -103,6 +175,13 @@ class Review(models.Model):
         ],
         verbose_name='score'
     )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='comment count'
+    )
+
+    denormalized_fields = ('comment_count',)
 
     class Meta:
         verbose_name = 'review'
@@ -115,9 +194,23 @@ class Review(models.Model):
                 fields=('title', 'author'),
                 name='unique_following'),
         )
+        indexes = (
+            models.Index(
+                fields=('title', '-pub_date'),
+                name='review_title_pub_date_idx'),
+            models.Index(
+                fields=('pub_date',),
+                name='review_pub_date_idx'),
+        )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
 
-class Comment(models.Model):
+
+class Comment(AtomicSaveMixin, models.Model):
     review = models.ForeignKey(
         to=Review,
         on_delete=models.CASCADE,
@@ -130,7 +223,7 @@ class Comment(models.Model):
         related_name='comments',
         verbose_name='author'
     )
-    text = models.TextField(
+    text = CompressedTextField(
         verbose_name='author'
     )
     pub_date = models.DateTimeField(
@@ -143,3 +236,253 @@ class Comment(models.Model):
         ordering = (
             '-pub_date',
         )
+        indexes = (
+            models.Index(
+                fields=('review', '-pub_date'),
+                name='comment_review_pub_date_idx'),
+            models.Index(
+                fields=('pub_date',),
+                name='comment_pub_date_idx'),
+        )
+
+
+class TitleRating(models.Model):
+    title = models.OneToOneField(
+        to=Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking',
+        verbose_name='title'
+    )
+    votes = models.PositiveIntegerField(
+        default=0,
+        verbose_name='votes'
+    )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='score sum'
+    )
+    weighted_rating = models.FloatField(
+        default=0,
+        db_index=True,
+        verbose_name='weighted rating'
+    )
+    score_1 = models.PositiveIntegerField(default=0)
+    score_2 = models.PositiveIntegerField(default=0)
+    score_3 = models.PositiveIntegerField(default=0)
+    score_4 = models.PositiveIntegerField(default=0)
+    score_5 = models.PositiveIntegerField(default=0)
+    score_6 = models.PositiveIntegerField(default=0)
+    score_7 = models.PositiveIntegerField(default=0)
+    score_8 = models.PositiveIntegerField(default=0)
+    score_9 = models.PositiveIntegerField(default=0)
+    score_10 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'title rating'
+        verbose_name_plural = 'title ratings'
+        ordering = ('-weighted_rating',)
+
+    def __str__(self):
+        return f'{self.title_id}: {self.weighted_rating:.2f}'
+
+    @staticmethod
+    def histogram_field(score):
+        return f'score_{score}'
+
+    @property
+    def histogram(self):
+        return [
+            getattr(self, self.histogram_field(score))
+            for score in SCORES
+        ]
+
+
+class RatingPrior(models.Model):
+    mean = models.FloatField(
+        verbose_name='prior mean'
+    )
+    computed = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='computed'
+    )
+
+    class Meta:
+        verbose_name = 'rating prior'
+        verbose_name_plural = 'rating priors'
+
+    def __str__(self):
+        return f'{self.mean:.3f}'
+
+
+class ArchivedReview(models.Model):
+    id = models.PositiveIntegerField(
+        primary_key=True
+    )
+    title_id = models.PositiveIntegerField(
+        verbose_name='title id'
+    )
+    author_id = models.PositiveIntegerField(
+        db_index=True,
+        verbose_name='author id'
+    )
+    text = CompressedTextField()
+    score = models.PositiveSmallIntegerField(
+        verbose_name='score'
+    )
+    pub_date = models.DateTimeField()
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='comment count'
+    )
+    archived = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='archived'
+    )
+
+    class Meta:
+        verbose_name = 'archived review'
+        verbose_name_plural = 'archived reviews'
+        ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('title_id', '-pub_date'),
+                name='archived_review_title_idx'),
+        )
+
+
+class ArchivedComment(models.Model):
+    id = models.PositiveIntegerField(
+        primary_key=True
+    )
+    review_id = models.PositiveIntegerField(
+        verbose_name='review id'
+    )
+    author_id = models.PositiveIntegerField(
+        db_index=True,
+        verbose_name='author id'
+    )
+    text = CompressedTextField()
+    pub_date = models.DateTimeField()
+    archived = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='archived'
+    )
+
+    class Meta:
+        verbose_name = 'archived comment'
+        verbose_name_plural = 'archived comments'
+        ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('review_id', '-pub_date'),
+                name='archived_comment_review_idx'),
+        )
+
+
+class CompressionDictionary(models.Model):
+    codec = models.CharField(
+        max_length=10,
+        verbose_name='codec'
+    )
+    data = models.BinaryField(
+        verbose_name='dictionary'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='created'
+    )
+
+    class Meta:
+        verbose_name = 'compression dictionary'
+        verbose_name_plural = 'compression dictionaries'
+        ordering = ('-id',)
+
+    def __str__(self):
+        return f'{self.codec} #{self.pk}'
+
+
+class SimilarTitle(models.Model):
+    title = models.ForeignKey(
+        to=Title,
+        on_delete=models.CASCADE,
+        related_name='similar_titles',
+        verbose_name='title'
+    )
+    similar = models.ForeignKey(
+        to=Title,
+        on_delete=models.CASCADE,
+        related_name='similar_for',
+        verbose_name='similar title'
+    )
+    rank = models.PositiveSmallIntegerField(
+        verbose_name='rank'
+    )
+    score = models.FloatField(
+        verbose_name='similarity'
+    )
+    computed = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name='computed'
+    )
+
+    class Meta:
+        verbose_name = 'similar title'
+        verbose_name_plural = 'similar titles'
+        ordering = ('title', 'rank')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('title', 'rank'),
+                name='unique_similar_title_rank'),
+        )
+
+    def __str__(self):
+        return f'{self.title_id} -> {self.similar_id}: {self.score:.3f}'
+
+
+class Change(models.Model):
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    ACTIONS = (
+        (CREATE, 'create'),
+        (UPDATE, 'update'),
+        (DELETE, 'delete'),
+    )
+
+    model = models.CharField(
+        max_length=20,
+        verbose_name='model'
+    )
+    object_id = models.PositiveIntegerField(
+        verbose_name='object id'
+    )
+    parent_id = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        verbose_name='parent id'
+    )
+    action = models.CharField(
+        max_length=10,
+        choices=ACTIONS,
+        verbose_name='action'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='created'
+    )
+
+    class Meta:
+        verbose_name = 'change'
+        verbose_name_plural = 'changes'
+        ordering = ('id',)
+        indexes = (
+            models.Index(
+                fields=('model', 'object_id'),
+                name='change_model_object_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.id}: {self.action} {self.model} {self.object_id}'
@@ -0,0 +1,149 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (Count, ExpressionWrapper, F, FloatField, Q,
+                              Sum)
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .archive import archived_histograms
+from .models import SCORES, RatingPrior, Review, Title, TitleRating
+
+PRIOR_PK = 1
+DEFAULT_PRIOR_MEAN = 5.5
+
+
+def weighted_rating(votes, score_sum, mean, min_votes=None):
+    if min_votes is None:
+        min_votes = settings.TOP_TITLES_MIN_VOTES
+    if votes + min_votes == 0:
+        return mean
+    return (score_sum + min_votes * mean) / (votes + min_votes)
+
+
+def catalog_mean():
+    totals = TitleRating.objects.aggregate(
+        votes=Sum('votes'), score_sum=Sum('score_sum'))
+    if not totals['votes']:
+        return DEFAULT_PRIOR_MEAN
+    return totals['score_sum'] / totals['votes']
+
+
+def prior_mean():
+    if settings.TOP_TITLES_PRIOR_MEAN is not None:
+        return settings.TOP_TITLES_PRIOR_MEAN
+    mean = RatingPrior.objects.filter(
+        pk=PRIOR_PK).values_list('mean', flat=True).first()
+    if mean is None:
+        prior, _ = RatingPrior.objects.get_or_create(
+            pk=PRIOR_PK, defaults={'mean': catalog_mean()})
+        mean = prior.mean
+    return mean
+
+
+def apply_score_change(title_id, added=None, removed=None):
+    if added == removed:
+        return
+    changes = {}
+    votes_delta = sum_delta = 0
+    if added is not None:
+        field = TitleRating.histogram_field(added)
+        changes[field] = F(field) + 1
+        votes_delta += 1
+        sum_delta += added
+    if removed is not None:
+        field = TitleRating.histogram_field(removed)
+        changes[field] = Greatest(F(field) - 1, 0)
+        votes_delta -= 1
+        sum_delta -= removed
+    min_votes = settings.TOP_TITLES_MIN_VOTES
+    updated = TitleRating.objects.filter(title_id=title_id).update(
+        votes=Greatest(F('votes') + votes_delta, 0),
+        score_sum=Greatest(F('score_sum') + sum_delta, 0),
+        weighted_rating=ExpressionWrapper(
+            (F('score_sum') + (sum_delta + min_votes * prior_mean())) * 1.0
+            / Greatest(F('votes') + (votes_delta + min_votes), 1),
+            output_field=FloatField()
+        ),
+        **changes
+    )
+    if not updated and added is not None:
+        refresh_title(title_id)
+
+
+def refresh_title(title_id):
+    histogram = Review.objects.filter(title_id=title_id).aggregate(**{
+        TitleRating.histogram_field(score): Count('id', filter=Q(score=score))
+        for score in SCORES
+    })
+    if settings.ARCHIVE_ENABLED:
+        for row in archived_histograms([title_id]):
+            field = TitleRating.histogram_field(row['score'])
+            histogram[field] += row['count']
+    votes = sum(histogram.values())
+    score_sum = sum(
+        score * histogram[TitleRating.histogram_field(score)]
+        for score in SCORES
+    )
+    if not Title.objects.filter(pk=title_id).exists():
+        return
+    TitleRating.objects.update_or_create(title_id=title_id, defaults=dict(
+        votes=votes,
+        score_sum=score_sum,
+        weighted_rating=weighted_rating(votes, score_sum, prior_mean()),
+        **histogram
+    ))
+
+
+def backfill_missing(batch_size=500):
+    missing = Title.objects.filter(
+        ranking__isnull=True).values_list('pk', flat=True)
+    count = 0
+    while True:
+        title_ids = list(missing[:batch_size])
+        if not title_ids:
+            return count
+        with transaction.atomic():
+            for title_id in title_ids:
+                refresh_title(title_id)
+        count += len(title_ids)
+
+
+def refresh_all(batch_size=500):
+    histograms = {}
+    for row in Review.objects.order_by().values('title_id', 'score').annotate(
+            count=Count('id')):
+        histograms.setdefault(row['title_id'], {})[row['score']] = row['count']
+    if settings.ARCHIVE_ENABLED:
+        for row in archived_histograms():
+            histogram = histograms.setdefault(row['title_id'], {})
+            histogram[row['score']] = (
+                histogram.get(row['score'], 0) + row['count'])
+    mean = settings.TOP_TITLES_PRIOR_MEAN
+    if mean is None:
+        votes = scores = 0
+        for histogram in histograms.values():
+            votes += sum(histogram.values())
+            scores += sum(
+                score * count for score, count in histogram.items())
+        mean = scores / votes if votes else DEFAULT_PRIOR_MEAN
+    rows = []
+    for title_id in Title.objects.values_list('pk', flat=True).iterator():
+        histogram = histograms.get(title_id, {})
+        votes = sum(histogram.values())
+        score_sum = sum(score * count for score, count in histogram.items())
+        rows.append(TitleRating(
+            title_id=title_id,
+            votes=votes,
+            score_sum=score_sum,
+            weighted_rating=weighted_rating(votes, score_sum, mean),
+            **{
+                TitleRating.histogram_field(score): count
+                for score, count in histogram.items()
+            }
+        ))
+    with transaction.atomic():
+        TitleRating.objects.all().delete()
+        TitleRating.objects.bulk_create(rows, batch_size=batch_size)
+        RatingPrior.objects.update_or_create(pk=PRIOR_PK, defaults={
+            'mean': mean, 'computed': timezone.now()})
+    return len(rows), mean
@@ -0,0 +1,26 @@
+ARCHIVE_DB = 'archive'
+ARCHIVED_MODELS = ('archivedreview', 'archivedcomment')
+
+
+def is_archived(app_label, model_name):
+    return app_label == 'reviews' and model_name in ARCHIVED_MODELS
+
+
+class ArchiveRouter:
+
+    def db_for_read(self, model, **hints):
+        if is_archived(model._meta.app_label, model._meta.model_name):
+            return ARCHIVE_DB
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if model_name is not None and is_archived(app_label, model_name):
+            return db == ARCHIVE_DB
+        if db == ARCHIVE_DB:
+            return False
+        return None
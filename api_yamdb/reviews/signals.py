@@ -0,0 +1,159 @@
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from .archive import purge_archived
+from .changes import TRACKED_MODELS, record_change, record_title_updates
+from .deletion import counters_deferred
+from .genre_cache import refresh_genre_cache, titles_with_genre
+from .models import (Category, Change, Comment, Genre, Review, Title,
+                     TitleRating, User)
+from .ranking import apply_score_change, prior_mean, refresh_title
+
+
+@receiver(post_save, sender=Title)
+def create_title_rating(sender, instance, created, **kwargs):
+    if created:
+        TitleRating.objects.create(
+            title=instance, weighted_rating=prior_mean())
+
+
+@receiver(post_save, sender=Review)
+def update_title_rating(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    if created:
+        apply_score_change(instance.title_id, added=instance.score)
+    elif 'score' in loaded and loaded.get('title_id') == instance.title_id:
+        apply_score_change(
+            instance.title_id,
+            added=instance.score,
+            removed=loaded['score']
+        )
+    else:
+        refresh_title(instance.title_id)
+        if loaded.get('title_id', instance.title_id) != instance.title_id:
+            refresh_title(loaded['title_id'])
+    instance._loaded_values = {
+        'title_id': instance.title_id, 'score': instance.score}
+
+
+@receiver(post_delete, sender=Review)
+def remove_title_rating_score(sender, instance, **kwargs):
+    if counters_deferred():
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    apply_score_change(
+        loaded.get('title_id', instance.title_id),
+        removed=loaded.get('score', instance.score)
+    )
+
+
+@receiver(post_save, sender=Review)
+def increment_review_count(sender, instance, created, **kwargs):
+    if created:
+        Title.objects.filter(pk=instance.title_id).update(
+            review_count=F('review_count') + 1)
+
+
+@receiver(post_delete, sender=Review)
+def decrement_review_count(sender, instance, **kwargs):
+    if counters_deferred():
+        return
+    Title.objects.filter(pk=instance.title_id).update(
+        review_count=Greatest(F('review_count') - 1, 0))
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    if created:
+        Review.objects.filter(pk=instance.review_id).update(
+            comment_count=F('comment_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    if counters_deferred():
+        return
+    Review.objects.filter(pk=instance.review_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def sync_title_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._cleared_titles = list(titles_with_genre(instance))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        refresh_genre_cache([instance.pk])
+    elif action == 'post_clear':
+        refresh_genre_cache(getattr(instance, '_cleared_titles', ()))
+    else:
+        refresh_genre_cache(pk_set)
+
+
+@receiver(post_save, sender=Genre)
+def sync_renamed_genre(sender, instance, created, **kwargs):
+    if not created:
+        title_ids = list(titles_with_genre(instance))
+        refresh_genre_cache(title_ids)
+        record_title_updates(title_ids)
+
+
+@receiver(pre_delete, sender=Genre)
+def remember_genre_titles(sender, instance, **kwargs):
+    instance._deleted_titles = list(titles_with_genre(instance))
+
+
+@receiver(post_delete, sender=Genre)
+def sync_deleted_genre(sender, instance, **kwargs):
+    title_ids = getattr(instance, '_deleted_titles', ())
+    refresh_genre_cache(title_ids)
+    record_title_updates(title_ids)
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_titles(sender, instance, **kwargs):
+    instance._cleared_titles = list(
+        instance.titles.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def record_cleared_category(sender, instance, **kwargs):
+    record_title_updates(getattr(instance, '_cleared_titles', ()))
+
+
+@receiver(post_save)
+def record_saved_change(sender, instance, created, raw=False, **kwargs):
+    if sender in TRACKED_MODELS and not raw:
+        record_change(instance, Change.CREATE if created else Change.UPDATE)
+
+
+@receiver(post_delete)
+def record_deleted_change(sender, instance, **kwargs):
+    if sender in TRACKED_MODELS:
+        record_change(instance, Change.DELETE)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def record_title_genres_change(sender, instance, action, reverse, pk_set,
+                               **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        record_title_updates([instance.pk])
+    elif action == 'post_clear':
+        record_title_updates(getattr(instance, '_cleared_titles', ()))
+    else:
+        record_title_updates(pk_set)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+def purge_archived_rows(sender, instance, **kwargs):
+    if settings.ARCHIVE_ENABLED:
+        purge_archived(sender, instance.pk)
@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Change, Review, SimilarTitle
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+
+def load_matrix():
+    rows = Review.objects.values_list('title_id', 'author_id', 'score')
+    titles, authors, scores = zip(*rows) if rows else ((), (), ())
+    title_ids, title_rows = np.unique(
+        np.asarray(titles, dtype=np.int64), return_inverse=True)
+    _, author_columns = np.unique(
+        np.asarray(authors, dtype=np.int64), return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.asarray(scores, dtype=np.float32), (title_rows, author_columns)),
+        shape=(len(title_ids), author_columns.max() + 1 if scores else 0)
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return title_ids, sparse.diags(1 / norms) @ matrix
+
+
+def top_similar(title_ids, matrix, rows, top_k, chunk_size):
+    transposed = matrix.T.tocsc()
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        similarities = (matrix[chunk] @ transposed).tocsr()
+        for offset, row in enumerate(chunk):
+            begin, end = similarities.indptr[offset:offset + 2]
+            columns = similarities.indices[begin:end]
+            scores = similarities.data[begin:end]
+            keep = (columns != row) & (scores > 0)
+            columns, scores = columns[keep], scores[keep]
+            if len(scores) > top_k:
+                best = np.argpartition(-scores, top_k)[:top_k]
+                columns, scores = columns[best], scores[best]
+            order = np.lexsort((title_ids[columns], -scores))
+            yield int(title_ids[row]), [
+                (int(title_ids[columns[index]]), float(scores[index]))
+                for index in order
+            ]
+
+
+def store(results, computed):
+    with transaction.atomic():
+        SimilarTitle.objects.filter(
+            title_id__in=[title_id for title_id, _ in results]).delete()
+        SimilarTitle.objects.bulk_create([
+            SimilarTitle(
+                title_id=title_id, similar_id=similar_id,
+                rank=rank, score=score, computed=computed
+            )
+            for title_id, similar in results
+            for rank, (similar_id, score) in enumerate(similar, 1)
+        ], batch_size=1000)
+
+
+def stale_titles():
+    last = SimilarTitle.objects.aggregate(last=Max('computed'))['last']
+    if last is None:
+        return None
+    changed = set(Change.objects.filter(
+        model='review', created__gte=last
+    ).values_list('parent_id', flat=True))
+    neighbours = set(SimilarTitle.objects.filter(
+        similar_id__in=changed
+    ).values_list('title_id', flat=True))
+    neighbours |= set(Review.objects.filter(
+        author__reviews__title_id__in=changed
+    ).values_list('title_id', flat=True))
+    return changed | neighbours
+
+
+def refresh_similar(top_k, chunk_size, title_ids=None):
+    computed = timezone.now()
+    ids, matrix = load_matrix()
+    if title_ids is None:
+        rows = np.arange(len(ids))
+        SimilarTitle.objects.exclude(title_id__in=ids.tolist()).delete()
+    else:
+        rows = np.flatnonzero(np.isin(ids, list(title_ids)))
+        SimilarTitle.objects.filter(title_id__in=title_ids).exclude(
+            title_id__in=ids[rows].tolist()).delete()
+    results = []
+    count = 0
+    for item in top_similar(ids, matrix, rows, top_k, chunk_size):
+        results.append(item)
+        if len(results) >= chunk_size:
+            store(results, computed)
+            count += len(results)
+            results = []
+    store(results, computed)
+    return count + len(results)
@@ -1,9 +1,26 @@
 from django.contrib import admin
+from django.db.models import Q
 
+from reviews.paginators import EstimatedCountPaginator
 from users.models import User
 
+PREFIX_UPPER_BOUND = '\U0010ffff'
+
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
+    list_display = ('username', 'email', 'role')
     search_fields = ['username', 'email']
     list_filter = ['role']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        upper = term + PREFIX_UPPER_BOUND
+        return queryset.filter(
+            Q(username__gte=term, username__lt=upper)
+            | Q(email__gte=term, email__lt=upper)
+        ), False
@@ -32,6 +32,11 @@ class User(AbstractUser):
         choices=USER_ROLES_CHOICES,
         default=USER
     )
+    pending_delete = models.BooleanField(
+        default=False,
+        db_index=True,
+        verbose_name='pending delete'
+    )
 
     class Meta:
         ordering = ['-date_joined']
@@ -58,3 +63,6 @@ class User(AbstractUser):
         ordering = (
             '-username',
         )
+        indexes = (
+            models.Index(fields=('email',), name='user_email_idx'),
+        )
@@ -0,0 +1,112 @@
+import pytest
+
+from .common import create_reviews, create_titles
+
+
+class Test08TopTitlesAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_top_not_auth(self, client):
+        response = client.get('/api/v1/titles/top/')
+        assert response.status_code != 404, (
+            'Страница `/api/v1/titles/top/` не найдена, проверьте этот адрес в *urls.py*'
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что при GET запросе `/api/v1/titles/top/` без токена авторизации возвращается статус 200'
+        )
+        assert response.json() == [], (
+            'Проверьте, что без отзывов `/api/v1/titles/top/` возвращает пустой список'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_top_weighted(self, client, admin_client, admin, settings):
+        settings.TOP_TITLES_MIN_VOTES = 3
+        settings.TOP_TITLES_PRIOR_MEAN = 6
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        response = client.get('/api/v1/titles/top/')
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 1, (
+            'Проверьте, что `/api/v1/titles/top/` возвращает только произведения с отзывами'
+        )
+        assert data[0]['id'] == titles[0]['id']
+        assert data[0]['rating'] == 4, (
+            'Проверьте, что `/api/v1/titles/top/` возвращает среднюю оценку в поле `rating`'
+        )
+        assert data[0]['weighted_rating'] == pytest.approx((5 + 3 + 4 + 3 * 6) / 6), (
+            'Проверьте, что `weighted_rating` учитывает априорную оценку и минимальное число голосов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_top_slices(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        response = client.get('/api/v1/titles/top/?genre=comedy')
+        assert [title['id'] for title in response.json()] == [titles[0]['id']]
+        response = client.get('/api/v1/titles/top/?genre=drama')
+        assert response.json() == [], (
+            'Проверьте, что `/api/v1/titles/top/` фильтрует по slug жанра'
+        )
+        response = client.get('/api/v1/titles/top/?category=books')
+        assert response.json() == [], (
+            'Проверьте, что `/api/v1/titles/top/` фильтрует по slug категории'
+        )
+        response = client.get('/api/v1/titles/top/?limit=abc')
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_refresh_command(self, client, admin_client, admin, settings):
+        from django.core.management import call_command
+        from reviews.models import TitleRating
+
+        settings.TOP_TITLES_MIN_VOTES = 0
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        TitleRating.objects.all().delete()
+        call_command('refresh_top_titles')
+        assert TitleRating.objects.count() == len(titles), (
+            'Проверьте, что команда `refresh_top_titles` создаёт строку рейтинга для каждого произведения'
+        )
+        data = client.get('/api/v1/titles/top/').json()
+        assert data[0]['weighted_rating'] == pytest.approx(4)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_missing_rating_rows(self, client, admin_client, admin, settings):
+        from io import StringIO
+
+        from django.core.management import call_command
+        from reviews.models import TitleRating
+
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        title_id = titles[0]['id']
+        TitleRating.objects.all().delete()
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.json()['rating'] == 4, (
+            'Проверьте, что без строки рейтинга оценка считается по отзывам'
+        )
+        admin_client.delete(f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/')
+        admin_client.post(f'/api/v1/titles/{titles[1]["id"]}/reviews/', data={'text': 'new', 'score': 7})
+        assert TitleRating.objects.get(title_id=titles[1]['id']).votes == 1, (
+            'Проверьте, что новый отзыв создаёт отсутствующую строку рейтинга'
+        )
+        call_command('refresh_top_titles', missing=True, stdout=StringIO())
+        assert TitleRating.objects.get(title_id=title_id).votes == 2, (
+            'Проверьте, что `refresh_top_titles --missing` создаёт недостающие рейтинги'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_shared_prior_mean(self, client, admin_client, admin, settings):
+        from django.core.cache import cache
+        from django.core.management import call_command
+        from reviews.models import RatingPrior, TitleRating
+
+        settings.TOP_TITLES_MIN_VOTES = 2
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        call_command('refresh_top_titles')
+        assert RatingPrior.objects.get().mean == pytest.approx(4), (
+            'Проверьте, что `refresh_top_titles` сохраняет априорную оценку в базе'
+        )
+        cache.clear()
+        admin_client.post(f'/api/v1/titles/{titles[1]["id"]}/reviews/', data={'text': 'new', 'score': 10})
+        assert TitleRating.objects.get(title_id=titles[1]['id']).weighted_rating == pytest.approx(
+            (10 + 2 * 4) / 3), (
+            'Проверьте, что все процессы используют одну и ту же априорную оценку'
+        )
@@ -0,0 +1,58 @@
+import pytest
+
+from .common import auth_client, create_reviews
+
+
+class Test09ScoreHistogramAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_histogram_detail(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.status_code == 200
+        assert response.json().get('score_histogram') == [0, 0, 1, 1, 1, 0, 0, 0, 0, 0], (
+            'Проверьте, что `/api/v1/titles/{title_id}/` возвращает гистограмму оценок `score_histogram`'
+        )
+        response = client.get(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert response.json().get('score_histogram') == [0] * 10
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_histogram_incremental(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        response = auth_client(user).patch(
+            f'{url}reviews/{reviews[1]["id"]}/', data={'score': 10})
+        assert response.status_code == 200
+        assert client.get(url).json()['score_histogram'] == [0, 0, 0, 1, 1, 0, 0, 0, 0, 1], (
+            'Проверьте, что гистограмма оценок обновляется при изменении отзыва'
+        )
+        admin_client.delete(f'{url}reviews/{reviews[0]["id"]}/')
+        data = client.get(url).json()
+        assert data['score_histogram'] == [0, 0, 0, 1, 0, 0, 0, 0, 0, 1], (
+            'Проверьте, что гистограмма оценок обновляется при удалении отзыва'
+        )
+        assert data['rating'] == 7
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_histogram_list(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        results = client.get('/api/v1/titles/').json()['results']
+        assert all('score_histogram' not in title for title in results), (
+            'Проверьте, что список произведений по умолчанию не возвращает `score_histogram`'
+        )
+        results = client.get('/api/v1/titles/?histogram=true').json()['results']
+        histograms = {title['id']: title['score_histogram'] for title in results}
+        assert histograms[titles[0]['id']] == [0, 0, 1, 1, 1, 0, 0, 0, 0, 0]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_histogram_rebuild(self, client, admin_client, admin):
+        from django.core.management import call_command
+        from reviews.models import TitleRating
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        TitleRating.objects.update(score_3=0, score_4=7)
+        call_command('refresh_top_titles')
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json()['score_histogram'] == [0, 0, 1, 1, 1, 0, 0, 0, 0, 0], (
+            'Проверьте, что команда `refresh_top_titles` пересобирает гистограммы оценок'
+        )
@@ -0,0 +1,50 @@
+import pytest
+
+from .common import create_comments
+
+
+class Test10SparseFieldsAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_fields(self, client, admin_client, admin, django_assert_num_queries):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        response = client.get('/api/v1/titles/?fields=id,name,rating')
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert all(set(title) == {'id', 'name', 'rating'} for title in results), (
+            'Проверьте, что параметр `fields` ограничивает поля в ответе `/api/v1/titles/`'
+        )
+        with django_assert_num_queries(2):
+            client.get('/api/v1/titles/?fields=id,name')
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/?exclude=description,genre')
+        data = response.json()
+        assert 'description' not in data and 'genre' not in data, (
+            'Проверьте, что параметр `exclude` убирает поля из ответа `/api/v1/titles/{title_id}/`'
+        )
+        assert data['rating'] == 4
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_comments_fields(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        results = client.get(f'{url}?exclude=text').json()['results']
+        assert all('text' not in review and 'score' in review for review in results), (
+            'Проверьте, что параметр `exclude` работает для `/api/v1/titles/{title_id}/reviews/`'
+        )
+        results = client.get(f'{url}{reviews[0]["id"]}/comments/?fields=id,author').json()['results']
+        assert all(set(comment) == {'id', 'author'} for comment in results), (
+            'Проверьте, что параметр `fields` работает для `/api/v1/titles/{title_id}/reviews/{review_id}/comments/`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_users_fields(self, admin_client):
+        results = admin_client.get('/api/v1/users/?fields=username,role').json()['results']
+        assert results and all(set(user) == {'username', 'role'} for user in results), (
+            'Проверьте, что параметр `fields` работает для `/api/v1/users/`'
+        )
+        data = {'username': 'TestUser', 'email': 'testuser@yamdb.fake', 'role': 'user'}
+        response = admin_client.post('/api/v1/users/?fields=username', data=data)
+        assert response.status_code == 201
+        assert response.json()['email'] == data['email'], (
+            'Проверьте, что параметр `fields` не влияет на запись'
+        )
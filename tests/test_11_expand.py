@@ -0,0 +1,56 @@
+import pytest
+
+from .common import auth_client, create_comments
+
+
+class Test11ExpandAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_expand_reviews(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/?expand=reviews')
+        assert response.status_code == 200
+        data = response.json()
+        assert 'reviews' in data, (
+            'Проверьте, что `?expand=reviews` добавляет отзывы в ответ `/api/v1/titles/{title_id}/`'
+        )
+        assert [review['id'] for review in data['reviews']] == [review['id'] for review in reversed(reviews)], (
+            'Проверьте, что вложенные отзывы отсортированы по дате публикации'
+        )
+        assert 'comments' not in data['reviews'][0]
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert 'reviews' not in response.json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_expand_limits(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        response = client.get(
+            '/api/v1/titles/?expand=reviews.comments&reviews_limit=2&comments_limit=1'
+        )
+        results = {title['id']: title for title in response.json()['results']}
+        expanded = results[titles[0]['id']]['reviews']
+        assert len(expanded) == 2, (
+            'Проверьте, что `reviews_limit` ограничивает число вложенных отзывов'
+        )
+        assert results[titles[1]['id']]['reviews'] == []
+        response = client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/?expand=reviews.comments&comments_limit=1'
+        )
+        by_id = {review['id']: review for review in response.json()['reviews']}
+        assert [c['id'] for c in by_id[reviews[0]['id']]['comments']] == [comments[-1]['id']], (
+            'Проверьте, что `comments_limit` ограничивает число вложенных комментариев'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_expand_fixed_queries(self, client, admin_client, admin, django_assert_num_queries):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        url = '/api/v1/titles/?expand=reviews.comments'
+        with django_assert_num_queries(4):
+            client.get(url)
+        author = auth_client(user)
+        author.post(f'/api/v1/titles/{titles[1]["id"]}/reviews/', data={'text': 'ok', 'score': 7})
+        review_id = reviews[1]['id']
+        for text in ('a', 'b', 'c', 'd'):
+            author.post(f'/api/v1/titles/{titles[0]["id"]}/reviews/{review_id}/comments/', data={'text': text})
+        with django_assert_num_queries(4):
+            client.get(url)
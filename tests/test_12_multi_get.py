@@ -0,0 +1,42 @@
+import pytest
+
+from .common import create_reviews, create_users_api
+
+
+class Test12MultiGetAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_ids(self, client, admin_client, admin, django_assert_num_queries):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        ids = f'{titles[1]["id"]},9999,{titles[0]["id"]}'
+        with django_assert_num_queries(1):
+            response = client.get(f'/api/v1/titles/?ids={ids}')
+        assert response.status_code == 200
+        data = response.json()
+        assert [title['id'] for title in data['results']] == [titles[1]['id'], titles[0]['id']], (
+            'Проверьте, что `?ids=` возвращает произведения в запрошенном порядке'
+        )
+        assert data['missing'] == [9999], (
+            'Проверьте, что `?ids=` возвращает отсутствующие id в поле `missing`'
+        )
+        assert data['results'][1]['rating'] == 4
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_ids_validation(self, client, settings):
+        settings.MULTI_GET_MAX_KEYS = 2
+        assert client.get('/api/v1/titles/?ids=1,a').status_code == 400
+        assert client.get('/api/v1/titles/?ids=1,2,3').status_code == 400, (
+            'Проверьте, что размер пакета `?ids=` ограничен'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_reviews_and_users(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/reviews/?ids={reviews[2]["id"]},{reviews[0]["id"]}')
+        assert [review['id'] for review in response.json()['results']] == [reviews[2]['id'], reviews[0]['id']]
+        response = admin_client.get(f'/api/v1/users/?usernames={moderator.username},nobody,{user.username}')
+        data = response.json()
+        assert [u['username'] for u in data['results']] == [moderator.username, user.username], (
+            'Проверьте, что `?usernames=` возвращает пользователей в запрошенном порядке'
+        )
+        assert data['missing'] == ['nobody']
@@ -0,0 +1,47 @@
+import gzip
+
+import pytest
+
+from .common import create_titles
+
+
+class Test13CompressionAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_gzip(self, client, admin_client, settings):
+        settings.COMPRESSION_MIN_SIZE = 10
+        create_titles(admin_client)
+        plain = client.get('/api/v1/titles/')
+        assert 'Content-Encoding' not in plain, (
+            'Проверьте, что ответ не сжимается без заголовка `Accept-Encoding`'
+        )
+        response = client.get('/api/v1/titles/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        assert response['Content-Encoding'] == 'gzip', (
+            'Проверьте, что ответ сжимается gzip при `Accept-Encoding: gzip`'
+        )
+        assert 'Accept-Encoding' in response['Vary']
+        assert gzip.decompress(response.content) == plain.content
+        assert int(response['Content-Length']) == len(response.content)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_threshold_and_quality(self, client, admin_client, settings):
+        create_titles(admin_client)
+        settings.COMPRESSION_MIN_SIZE = 10 ** 6
+        response = client.get('/api/v1/titles/', HTTP_ACCEPT_ENCODING='gzip')
+        assert 'Content-Encoding' not in response, (
+            'Проверьте, что ответы меньше `COMPRESSION_MIN_SIZE` не сжимаются'
+        )
+        settings.COMPRESSION_MIN_SIZE = 10
+        response = client.get('/api/v1/titles/', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        assert 'Content-Encoding' not in response
+
+    def test_03_negotiation(self, settings):
+        from api.middleware import COMPRESSORS, negotiate_encoding
+
+        settings.COMPRESSION_ENCODINGS = ('zstd', 'br', 'gzip')
+        assert negotiate_encoding('') is None
+        assert negotiate_encoding('*') == next(
+            encoding for encoding in settings.COMPRESSION_ENCODINGS if encoding in COMPRESSORS
+        )
+        assert negotiate_encoding('gzip;q=0.5, unknown') == 'gzip'
+        assert negotiate_encoding('identity') is None
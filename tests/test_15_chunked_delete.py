@@ -0,0 +1,109 @@
+import pytest
+
+from .common import create_comments
+
+
+class Test15ChunkedDelete:
+
+    @pytest.fixture(autouse=True)
+    def chunked(self, settings):
+        settings.CHUNKED_DELETE_THRESHOLD = 1
+        settings.CHUNKED_DELETE_BATCH_SIZE = 1
+        settings.CHUNKED_DELETE_PAUSE = 0
+        settings.CHUNKED_DELETE_ASYNC = False
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title(self, client, admin_client, admin):
+        from reviews.models import Comment, Review, Title
+
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        response = admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.status_code == 204
+        assert not Title.objects.filter(pk=titles[0]['id']).exists(), (
+            'Проверьте, что произведение удаляется пакетами вместе с отзывами'
+        )
+        assert not Review.objects.exists() and not Comment.objects.exists()
+        assert Title.objects.filter(pk=titles[1]['id']).exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_user_and_category(self, client, admin_client, admin):
+        from reviews.models import Review, Title
+
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 204
+        assert admin_client.get(f'/api/v1/users/{user.username}/').status_code == 404
+        assert not Review.objects.filter(author__username=user.username).exists()
+        assert Review.objects.count() == 2
+        response = admin_client.delete('/api/v1/categories/films/')
+        assert response.status_code == 204
+        assert Title.objects.get(pk=titles[0]['id']).category is None, (
+            'Проверьте, что при пакетном удалении категории у произведений сбрасывается категория'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_background(self, client, admin_client, admin, settings):
+        from reviews import deletion
+        from reviews.models import Review, Title
+
+        settings.CHUNKED_DELETE_ASYNC = True
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        title_id = titles[0]['id']
+        admin_client.delete(f'/api/v1/titles/{title_id}/')
+        deletion.jobs.join()
+        assert client.get(f'/api/v1/titles/{title_id}/').status_code == 404
+        assert not Title.objects.filter(pk=title_id).exists(), (
+            'Проверьте, что фоновый воркер удаляет помеченное произведение'
+        )
+        assert not Review.objects.filter(title_id=title_id).exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_resume(self, client, admin_client, admin):
+        from django.core.management import call_command
+        from reviews.models import Title
+
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        Title.objects.filter(pk=titles[0]['id']).update(pending_delete=True)
+        assert client.get(f'/api/v1/titles/{titles[0]["id"]}/').status_code == 404, (
+            'Проверьте, что помеченное на удаление произведение скрыто из API'
+        )
+        assert client.get(f'/api/v1/titles/{titles[0]["id"]}/reviews/').status_code == 404
+        call_command('process_pending_deletes')
+        assert not Title.objects.filter(pk=titles[0]['id']).exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_rollback_keeps_data(self, admin_client, admin):
+        from django.db import transaction
+
+        from reviews.deletion import delete_instance
+        from reviews.models import Review, Title
+
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                delete_instance(Title.objects.get(pk=titles[0]['id']))
+                raise RuntimeError
+        assert Title.objects.filter(pk=titles[0]['id'], pending_delete=False).exists()
+        assert Review.objects.filter(title_id=titles[0]['id']).count() == 3, (
+            'Проверьте, что откат скрытия не запускает пакетное удаление'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_counters_and_changes(self, client, admin_client, admin):
+        from reviews.models import Change, Review, Title, TitleRating
+
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert title.review_count == 2, (
+            'Проверьте, что `review_count` пересчитывается после пакетного удаления'
+        )
+        assert TitleRating.objects.get(title=title).votes == 2
+        assert Review.objects.get(pk=reviews[0]['id']).comment_count == 2, (
+            'Проверьте, что `comment_count` пересчитывается после пакетного удаления'
+        )
+        admin_client.delete('/api/v1/categories/films/')
+        assert Change.objects.filter(
+            model='title', object_id=titles[0]['id'], action=Change.UPDATE).exists(), (
+            'Проверьте, что сброс категории попадает в журнал изменений'
+        )
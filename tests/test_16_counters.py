@@ -0,0 +1,75 @@
+import pytest
+
+from .common import create_comments
+
+
+class Test16CountersAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_counts(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        data = client.get(f'/api/v1/titles/{titles[0]["id"]}/').json()
+        assert data.get('review_count') == 3, (
+            'Проверьте, что `/api/v1/titles/{title_id}/` возвращает число отзывов `review_count`'
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        counts = {review['id']: review['comment_count'] for review in client.get(url).json()['results']}
+        assert counts[reviews[0]['id']] == 3, (
+            'Проверьте, что отзывы возвращают число комментариев `comment_count`'
+        )
+        admin_client.delete(f'{url}{reviews[0]["id"]}/comments/{comments[0]["id"]}/')
+        assert client.get(f'{url}{reviews[0]["id"]}/').json()['comment_count'] == 2
+        admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        assert client.get(f'/api/v1/titles/{titles[0]["id"]}/').json()['review_count'] == 2, (
+            'Проверьте, что `review_count` уменьшается при удалении отзыва'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_ordering(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        results = client.get('/api/v1/titles/?ordering=-review_count').json()['results']
+        assert [title['id'] for title in results] == [titles[0]['id'], titles[1]['id']]
+        results = client.get('/api/v1/titles/?ordering=review_count').json()['results']
+        assert [title['id'] for title in results] == [titles[1]['id'], titles[0]['id']], (
+            'Проверьте, что произведения можно сортировать по `review_count`'
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?ordering=-comment_count'
+        assert client.get(url).json()['results'][0]['id'] == reviews[0]['id']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_check_counters(self, client, admin_client, admin):
+        from django.core.management import call_command
+        from reviews.models import Review, Title
+
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        Title.objects.update(review_count=7)
+        Review.objects.update(comment_count=0)
+        call_command('check_counters', '--fix')
+        assert Title.objects.get(pk=titles[0]['id']).review_count == 3
+        assert Title.objects.get(pk=titles[1]['id']).review_count == 0
+        assert Review.objects.get(pk=reviews[0]['id']).comment_count == 3, (
+            'Проверьте, что команда `check_counters --fix` исправляет счётчики'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_save_keeps_counters(self, admin_client, admin):
+        from django.db.models import F
+        from reviews.models import Review, Title
+
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        title = Title.objects.get(pk=titles[0]['id'])
+        review = Review.objects.get(pk=reviews[0]['id'])
+        Title.objects.filter(pk=title.pk).update(review_count=F('review_count') + 5)
+        Review.objects.filter(pk=review.pk).update(comment_count=F('comment_count') + 5)
+        title.name = 'Новое имя'
+        title.save()
+        review.text = 'Новый текст'
+        review.save()
+        title.refresh_from_db()
+        review.refresh_from_db()
+        assert (title.name, title.review_count) == ('Новое имя', 8), (
+            'Проверьте, что обычный save() не перезаписывает `review_count`'
+        )
+        assert (review.text, review.comment_count) == ('Новый текст', 8), (
+            'Проверьте, что обычный save() не перезаписывает `comment_count`'
+        )
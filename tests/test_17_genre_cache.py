@@ -0,0 +1,45 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test17GenreCacheAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_genres_without_join(self, client, admin_client, django_assert_num_queries):
+        titles, categories, genres = create_titles(admin_client)
+        with django_assert_num_queries(1):
+            data = client.get(f'/api/v1/titles/{titles[0]["id"]}/?exclude=score_histogram').json()
+        assert data['genre'] == [genres[1], genres[0]], (
+            'Проверьте, что жанры произведения возвращаются из денормализованного поля'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_sync(self, client, admin_client):
+        from reviews.models import Genre, Title
+
+        titles, categories, genres = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        admin_client.patch(url, data={'genre': [genres[2]['slug']]})
+        assert client.get(url).json()['genre'] == [genres[2]], (
+            'Проверьте, что жанры обновляются при изменении связи произведения с жанрами'
+        )
+        genre = Genre.objects.get(slug=genres[2]['slug'])
+        genre.name = 'Трагедия'
+        genre.save()
+        assert client.get(url).json()['genre'] == [{'name': 'Трагедия', 'slug': genres[2]['slug']}], (
+            'Проверьте, что жанры обновляются при переименовании жанра'
+        )
+        genre.title_set.clear()
+        assert Title.objects.get(pk=titles[1]['id']).cached_genres == []
+        admin_client.delete(f'/api/v1/genres/{genres[0]["slug"]}/')
+        assert Title.objects.get(pk=titles[0]['id']).cached_genres == []
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_filter(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        results = client.get('/api/v1/titles/?genre=med').json()['results']
+        assert [title['id'] for title in results] == [titles[0]['id']], (
+            'Проверьте, что фильтр `genre` работает по денормализованным жанрам'
+        )
+        assert client.get('/api/v1/titles/?genre=horror,comedy').json()['count'] == 0
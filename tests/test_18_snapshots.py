@@ -0,0 +1,71 @@
+import os
+
+import pytest
+from django.test import override_settings
+
+from api.snapshots import render_snapshots, snapshot_path
+from .common import create_reviews, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18Snapshots:
+
+    def test_01_render_and_serve(self, client, admin_client, tmp_path):
+        create_titles(admin_client)
+        urls = ['/api/v1/titles/', '/api/v1/titles/999999/']
+        with override_settings(CATALOG_SNAPSHOT_DIR=str(tmp_path),
+                               CATALOG_SNAPSHOT_URLS=urls,
+                               CATALOG_SNAPSHOTS_ENABLED=True,
+                               CATALOG_SNAPSHOT_DEBOUNCE=0):
+            assert render_snapshots() == ['/api/v1/titles/'], (
+                'Проверьте, что снимки пишутся только для ответов 200'
+            )
+            path = snapshot_path('/api/v1/titles/')
+            assert os.path.exists(path), (
+                'Проверьте, что снимок сохраняется в CATALOG_SNAPSHOT_DIR'
+            )
+            with open(path, 'w') as snapshot:
+                snapshot.write('{"snapshot": true}')
+            response = client.get('/api/v1/titles/')
+            assert response.json() == {'snapshot': True}, (
+                'Проверьте, что анонимный GET отдаётся из снимка'
+            )
+            response = admin_client.get('/api/v1/titles/')
+            assert 'results' in response.json(), (
+                'Проверьте, что авторизованные запросы идут мимо снимков'
+            )
+
+    def test_02_regenerate_on_write(self, client, admin_client, tmp_path):
+        with override_settings(CATALOG_SNAPSHOT_DIR=str(tmp_path),
+                               CATALOG_SNAPSHOT_URLS=['/api/v1/genres/'],
+                               CATALOG_SNAPSHOTS_ENABLED=True,
+                               CATALOG_SNAPSHOT_DEBOUNCE=0):
+            render_snapshots()
+            assert client.get('/api/v1/genres/').json()['count'] == 0
+            admin_client.post(
+                '/api/v1/genres/', data={'name': 'Ужасы', 'slug': 'horror'})
+            response = client.get(
+                '/api/v1/genres/', HTTP_ACCEPT_ENCODING='gzip')
+            assert response['Content-Encoding'] == 'gzip', (
+                'Проверьте, что отдаётся заранее сжатый вариант снимка'
+            )
+            response = client.get('/api/v1/genres/')
+            assert response.json()['count'] == 1, (
+                'Проверьте, что снимок перерисовывается после изменения жанров'
+            )
+
+    def test_03_username_change(self, client, admin_client, admin, tmp_path):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with override_settings(CATALOG_SNAPSHOT_DIR=str(tmp_path),
+                               CATALOG_SNAPSHOT_URLS=[url],
+                               CATALOG_SNAPSHOTS_ENABLED=True,
+                               CATALOG_SNAPSHOT_DEBOUNCE=0):
+            render_snapshots()
+            user.username = 'RenamedUser'
+            user.save()
+            authors = {
+                review['author'] for review in client.get(url).json()['results']}
+            assert 'RenamedUser' in authors, (
+                'Проверьте, что снимки отзывов перерисовываются при смене username'
+            )
@@ -0,0 +1,127 @@
+import datetime as dt
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews.changes import compact
+from reviews.models import Change, Genre
+from .common import create_comments, create_titles
+
+
+class Test19ChangesAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_feed(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        response = client.get('/api/v1/changes/')
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/changes/` доступен без токена'
+        )
+        data = response.json()
+        events = {(item['model'], item['object_id'], item['action']) for item in data['results']}
+        assert ('title', titles[0]['id'], 'create') in events
+        assert ('review', reviews[0]['id'], 'create') in events
+        assert ('comment', comments[0]['id'], 'create') in events
+        ids = [item['id'] for item in data['results']]
+        assert ids == sorted(ids), 'Проверьте, что события упорядочены по курсору'
+        review = next(item for item in data['results'] if item['model'] == 'review')
+        assert review['parent_id'] == titles[0]['id'], (
+            'Проверьте, что для отзыва возвращается `parent_id` произведения'
+        )
+        cursor = data['next']
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        admin_client.delete(url)
+        data = client.get(f'/api/v1/changes/?since={cursor}').json()
+        events = {(item['model'], item['object_id'], item['action']) for item in data['results']}
+        assert ('review', reviews[0]['id'], 'delete') in events, (
+            'Проверьте, что удаление отзыва попадает в журнал'
+        )
+        assert ('comment', comments[0]['id'], 'delete') in events, (
+            'Проверьте, что каскадное удаление комментариев попадает в журнал'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_batches(self, client, admin_client):
+        create_titles(admin_client)
+        total = Change.objects.count()
+        data = client.get('/api/v1/changes/?limit=2').json()
+        assert len(data['results']) == 2 and data['has_more'], (
+            'Проверьте, что `limit` ограничивает размер пачки'
+        )
+        seen = len(data['results'])
+        while data['has_more']:
+            data = client.get(f'/api/v1/changes/?since={data["next"]}&limit=2').json()
+            seen += len(data['results'])
+        assert seen == total, 'Проверьте, что пачки по курсору покрывают весь журнал'
+        assert client.get('/api/v1/changes/?since=abc').status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_compaction(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        admin_client.patch(f'/api/v1/titles/{title_id}/', data={'name': 'Новое'})
+        Change.objects.update(created=timezone.now() - dt.timedelta(days=60))
+        call_command('compact_changes', days=30)
+        events = Change.objects.filter(model='title', object_id=title_id)
+        assert events.count() == 1, (
+            'Проверьте, что после сжатия остаётся одно событие на объект'
+        )
+        assert events.get().action == Change.UPDATE
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_title_updates_from_genres_and_categories(self, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+
+        def title_updates():
+            return set(Change.objects.filter(
+                model='title', action=Change.UPDATE, id__gt=cursor
+            ).values_list('object_id', flat=True))
+
+        cursor = Change.objects.latest('id').id
+        genre = Genre.objects.get(slug=genres[2]['slug'])
+        genre.name = 'Новое имя'
+        genre.save()
+        assert title_updates() == {titles[1]['id']}, (
+            'Проверьте, что переименование жанра попадает в журнал как изменение произведений'
+        )
+        cursor = Change.objects.latest('id').id
+        admin_client.delete(f'/api/v1/genres/{genres[0]["slug"]}/')
+        assert title_updates() == {titles[0]['id']}, (
+            'Проверьте, что удаление жанра попадает в журнал как изменение произведений'
+        )
+        cursor = Change.objects.latest('id').id
+        admin_client.delete(f'/api/v1/categories/{categories[1]["slug"]}/')
+        assert title_updates() == {titles[1]['id']}, (
+            'Проверьте, что удаление категории попадает в журнал как изменение произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_compaction_in_batches(self, admin_client, monkeypatch):
+        from django.db import transaction
+
+        titles, _, _ = create_titles(admin_client)
+        for number in range(5):
+            admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/', data={'name': f'Имя {number}'})
+        admin_client.delete(f'/api/v1/titles/{titles[1]["id"]}/')
+        Change.objects.update(created=timezone.now() - dt.timedelta(days=60))
+        latest = {
+            (change.model, change.object_id): change.id
+            for change in Change.objects.order_by('id')
+        }
+        atomic = transaction.atomic
+        batches = []
+
+        def counting_atomic(*args, **kwargs):
+            batches.append(1)
+            return atomic(*args, **kwargs)
+
+        monkeypatch.setattr(transaction, 'atomic', counting_atomic)
+        deleted = compact(timezone.now() - dt.timedelta(days=30), batch_size=2)
+        monkeypatch.undo()
+        assert set(Change.objects.values_list('id', flat=True)) == set(latest.values())
+        assert deleted > 0 and len(batches) > 1, (
+            'Проверьте, что журнал сжимается пачками по диапазонам id'
+        )
+        compact(timezone.now() - dt.timedelta(days=30), drop_tombstones=True, batch_size=2)
+        assert not Change.objects.filter(action=Change.DELETE).exists()
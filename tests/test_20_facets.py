@@ -0,0 +1,115 @@
+import pytest
+
+from reviews.facets import title_index
+from reviews.models import Category, Genre
+from .common import create_titles
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    title_index.built = False
+
+
+class Test20FacetsAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_genre_combinations(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        data = client.get('/api/v1/titles/?genre__all=horror,comedy').json()
+        assert [item['id'] for item in data['results']] == [titles[0]['id']], (
+            'Проверьте, что `genre__all` требует все перечисленные жанры'
+        )
+        data = client.get('/api/v1/titles/?genre__any=horror,drama').json()
+        assert data['count'] == 2, 'Проверьте, что `genre__any` объединяет жанры'
+        data = client.get('/api/v1/titles/?genre__any=horror,drama&genre__not=comedy').json()
+        assert [item['id'] for item in data['results']] == [titles[1]['id']], (
+            'Проверьте, что `genre__not` исключает жанр'
+        )
+        data = client.get('/api/v1/titles/?year__gte=2001&year__lte=2030').json()
+        assert [item['id'] for item in data['results']] == [titles[1]['id']], (
+            'Проверьте фильтрацию по диапазону лет'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_facet_counts(self, client, admin_client):
+        create_titles(admin_client)
+        data = client.get('/api/v1/titles/?facets=1').json()
+        assert data['count'] == 2
+        assert data['facets'] == {
+            'genre': {'comedy': 1, 'drama': 1, 'horror': 1},
+            'category': {'books': 1, 'films': 1},
+            'year': {'2000': 1, '2020': 1},
+        }, 'Проверьте подсчёт фасетов по жанрам, категориям и годам'
+        data = client.get('/api/v1/titles/?facets=1&category__in=films').json()
+        assert data['facets']['genre'] == {'comedy': 1, 'horror': 1}, (
+            'Проверьте, что фасеты считаются по отфильтрованной выборке'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_incremental_and_paging(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        assert client.get('/api/v1/titles/?genre__any=drama').json()['count'] == 1
+        for number in range(12):
+            admin_client.post('/api/v1/titles/', data={
+                'name': f'Драма {number:02}', 'year': 1990 + number,
+                'genre': ['drama'], 'category': 'books', 'description': 'Драма'
+            })
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/', data={'genre': ['drama']})
+        data = client.get('/api/v1/titles/?genre__any=drama').json()
+        assert data['count'] == 14, 'Проверьте, что индекс обновляется после изменений'
+        names = [item['name'] for item in data['results']]
+        assert names == sorted(names) and len(names) == 10
+        data = client.get('/api/v1/titles/?genre__any=drama&page=2').json()
+        assert [item['name'] for item in data['results']] == ['Драма 10', 'Драма 11', 'Поворот туда', 'Проект'], (
+            'Проверьте постраничный вывод в порядке названий'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert client.get('/api/v1/titles/?genre__any=drama').json()['count'] == 13
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_renames_without_rebuild(self, client, admin_client, monkeypatch):
+        titles, categories, genres = create_titles(admin_client)
+        client.get('/api/v1/titles/?genre__any=drama')
+
+        def rebuild():
+            raise AssertionError('Индекс не должен перестраиваться целиком')
+
+        monkeypatch.setattr(title_index, 'rebuild', rebuild)
+        genre = Genre.objects.get(slug='drama')
+        genre.slug = 'tragedy'
+        genre.save()
+        data = client.get('/api/v1/titles/?genre__any=tragedy&facets=1').json()
+        assert [item['id'] for item in data['results']] == [titles[1]['id']], (
+            'Проверьте, что переименование жанра применяется к индексу на месте'
+        )
+        assert 'drama' not in data['facets']['genre']
+        Category.objects.get(slug='films').delete()
+        data = client.get('/api/v1/titles/?category__in=films&facets=1').json()
+        assert data['count'] == 0 and 'films' not in data['facets']['category'], (
+            'Проверьте, что удаление категории применяется к индексу на месте'
+        )
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'А', 'year': 1990, 'genre': ['tragedy'], 'category': 'books',
+            'description': 'Первая по алфавиту'
+        })
+        data = client.get('/api/v1/titles/?genre__any=tragedy').json()
+        assert [item['name'] for item in data['results']][0] == 'А'
+        assert data['count'] == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_consistent_with_sql_path(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        for query in ('genre__all=horror&ordering=name', f'year__lte=2010&ids={titles[0]["id"]}'):
+            response = client.get(f'/api/v1/titles/?{query}')
+            assert response.status_code == 400, (
+                'Проверьте, что фасетные фильтры не игнорируются молча '
+                'при сортировке или выборке по id'
+            )
+        for name in ('поворот', 'Поворот', 'ПОВОРОТ', 'проЕКТ'):
+            plain = client.get('/api/v1/titles/', {'name': name}).json()['count']
+            faceted = client.get('/api/v1/titles/', {
+                'name': name, 'genre__any': 'comedy,horror,drama'}).json()['count']
+            assert plain == faceted, (
+                f'Проверьте, что `name={name}` сравнивается одинаково '
+                'в индексе и в SQL'
+            )
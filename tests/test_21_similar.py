@@ -0,0 +1,62 @@
+import pytest
+from django.core.management import call_command
+
+from reviews.models import SimilarTitle, Title
+from .common import auth_client, create_titles, create_users_api
+
+
+class Test21SimilarAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_lookup(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        url = f'/api/v1/titles/{first}/similar/'
+        response = client.get(url)
+        assert response.status_code == 200 and response.json() == [], (
+            'Проверьте, что `/api/v1/titles/{title_id}/similar/` без расчёта возвращает пустой список'
+        )
+        SimilarTitle.objects.create(title_id=first, similar_id=second, rank=1, score=0.5)
+        data = client.get(url).json()
+        assert [item['id'] for item in data] == [second]
+        assert data[0]['similarity'] == 0.5, 'Проверьте, что возвращается поле `similarity`'
+        assert client.get('/api/v1/titles/999999/similar/').status_code == 404
+        assert client.get('/api/v1/titles/abc/similar/').status_code == 404, (
+            'Проверьте, что нечисловой id произведения возвращает 404'
+        )
+        Title.objects.filter(pk=first).update(pending_delete=True)
+        assert client.get(url).status_code == 404, (
+            'Проверьте, что для скрытого произведения похожие не возвращаются'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_command(self, client, admin_client, admin):
+        pytest.importorskip('scipy')
+        titles, _, _ = create_titles(admin_client)
+        third = admin_client.post('/api/v1/titles/', data={
+            'name': 'Третье', 'year': 2010, 'genre': ['drama'],
+            'category': 'books', 'description': 'Ещё одно'
+        }).json()['id']
+        user, moderator = create_users_api(admin_client)
+        scores = {
+            admin_client: {titles[0]['id']: 9, titles[1]['id']: 8},
+            auth_client(user): {titles[0]['id']: 10, titles[1]['id']: 9},
+            auth_client(moderator): {third: 5},
+        }
+        for api_client, reviews in scores.items():
+            for title_id, score in reviews.items():
+                api_client.post(f'/api/v1/titles/{title_id}/reviews/', data={'text': 'Текст', 'score': score})
+        call_command('refresh_similar_titles')
+        data = client.get(f'/api/v1/titles/{titles[0]["id"]}/similar/').json()
+        assert [item['id'] for item in data] == [titles[1]['id']], (
+            'Проверьте, что похожими считаются произведения с общими оценками'
+        )
+        assert data[0]['similarity'] == pytest.approx(1.0, abs=0.01)
+        assert client.get(f'/api/v1/titles/{third}/similar/').json() == []
+        auth_client(moderator).post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/', data={'text': 'Текст', 'score': 7})
+        call_command('refresh_similar_titles', incremental=True)
+        data = client.get(f'/api/v1/titles/{third}/similar/').json()
+        assert [item['id'] for item in data] == [titles[1]['id']], (
+            'Проверьте инкрементальный пересчёт по журналу изменений'
+        )
@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+from django.test import override_settings
+
+from api.middleware import AdmissionGate, admission_gates
+
+
+@pytest.fixture(autouse=True)
+def fresh_gates():
+    admission_gates.clear()
+    yield
+    admission_gates.clear()
+
+
+class Test22Admission:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reject_with_retry_after(self, client, admin_client):
+        limits = {
+            'read': {'concurrency': 0, 'queue': 0},
+            'write': {'concurrency': 4, 'queue': 4},
+            'auth': {'concurrency': 4, 'queue': 4},
+        }
+        with override_settings(ADMISSION_LIMITS=limits, ADMISSION_RETRY_AFTER=3):
+            response = client.get('/api/v1/titles/')
+            assert response.status_code == 503, (
+                'Проверьте, что при исчерпании лимита возвращается 503'
+            )
+            assert response['Retry-After'] == '3', 'Проверьте заголовок `Retry-After`'
+            response = admin_client.post('/api/v1/genres/', data={'name': 'Ужасы', 'slug': 'horror'})
+            assert response.status_code == 201, (
+                'Проверьте, что лимиты считаются отдельно для чтения и записи'
+            )
+            admission_gates.pop('read')
+        with override_settings(ADMISSION_LIMITS={**limits, 'read': {'concurrency': 1, 'queue': 1}}):
+            client.get('/api/v1/titles/')
+            stats = admin_client.get('/api/v1/admission/').json()
+        assert stats['read']['admitted'] == 2 and stats['write']['admitted'] == 1, (
+            'Проверьте, что `/api/v1/admission/` отдаёт счётчики по классам маршрутов'
+        )
+        assert client.get('/api/v1/admission/').status_code == 401
+
+    def test_02_low_priority_shed_first(self):
+        gate = AdmissionGate(concurrency=1, queue=2)
+        assert gate.acquire(False, 0)
+        with override_settings(ADMISSION_LOW_PRIORITY_SHARE=0.5):
+            waiter = threading.Thread(target=gate.acquire, args=(False, 5))
+            waiter.start()
+            while not gate.stats()['queue_depth']:
+                pass
+            assert not gate.acquire(True, 0.01), (
+                'Проверьте, что анонимные чтения отбрасываются раньше остальных'
+            )
+            gate.release()
+            waiter.join()
+        stats = gate.stats()
+        assert stats['shed'] == 1 and stats['admitted'] == 2 and stats['active'] == 1
@@ -0,0 +1,63 @@
+import threading
+import time
+
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from api.middleware import CoalescingMiddleware, coalescing_stats
+
+
+class Test23Coalescing:
+
+    def make_middleware(self, delay=0.0):
+        calls = []
+
+        def get_response(request):
+            calls.append(request)
+            time.sleep(delay)
+            return HttpResponse(f'{{"call": {len(calls)}}}', content_type='application/json')
+
+        return CoalescingMiddleware(get_response), calls
+
+    def test_01_concurrent_requests_share_response(self):
+        middleware, calls = self.make_middleware(delay=0.2)
+        factory = RequestFactory()
+        responses = []
+        leaders = coalescing_stats()['leaders']
+
+        def fetch():
+            responses.append(middleware(factory.get('/api/v1/titles/?page=1')))
+
+        threads = [threading.Thread(target=fetch) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1, (
+            'Проверьте, что одинаковые одновременные запросы вычисляются один раз'
+        )
+        assert {response.content for response in responses} == {b'{"call": 1}'}
+        assert all(response['Content-Type'] == 'application/json' for response in responses)
+        assert coalescing_stats()['leaders'] == leaders + 1
+        middleware(factory.get('/api/v1/titles/?page=1'))
+        assert len(calls) == 2, 'Проверьте, что завершённые ответы не кешируются'
+
+    def test_02_private_requests_bypass(self):
+        middleware, calls = self.make_middleware()
+        factory = RequestFactory()
+        middleware(factory.get('/api/v1/titles/', HTTP_AUTHORIZATION='Bearer token'))
+        middleware(factory.post('/api/v1/titles/'))
+        assert len(calls) == 2, (
+            'Проверьте, что авторизованные и небезопасные запросы не объединяются'
+        )
+
+    def test_03_shared_cache(self):
+        middleware, calls = self.make_middleware()
+        factory = RequestFactory()
+        with override_settings(COALESCE_SHARED_CACHE='default', COALESCE_RESULT_TTL=60):
+            first = middleware(factory.get('/api/v1/genres/?shared=1'))
+            second = middleware(factory.get('/api/v1/genres/?shared=1'))
+        assert len(calls) == 1, (
+            'Проверьте, что результат ведущего запроса передаётся через общий кеш'
+        )
+        assert first.content == second.content
@@ -0,0 +1,106 @@
+import datetime as dt
+import io
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.pagination import PageNumberPagination
+
+from reviews.models import (ArchivedComment, ArchivedReview, Change, Comment,
+                            Review)
+from .common import auth_client, create_comments
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'archive'])
+class Test24Archive:
+
+    def test_01_archive_and_restore(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        old = timezone.now() - dt.timedelta(days=400)
+        Review.objects.filter(pk=reviews[0]['id']).update(pub_date=old)
+        Comment.objects.update(pub_date=old)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        reviews_url = f'{title_url}reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        before = client.get(comments_url).json()
+        rating = client.get(title_url).json()['rating']
+        with override_settings(ARCHIVE_ENABLED=True):
+            call_command('archive_old_rows', days=365, reviews=True)
+            assert Comment.objects.count() == 0 and ArchivedComment.objects.count() == 3, (
+                'Проверьте, что старые комментарии переносятся в архив'
+            )
+            assert ArchivedReview.objects.filter(pk=reviews[0]['id']).exists()
+            assert Review.objects.count() == 2
+            assert client.get(comments_url).json() == before, (
+                'Проверьте, что архивные комментарии читаются прозрачно'
+            )
+            response = client.get(f'{comments_url}{comments[1]["id"]}/')
+            assert response.status_code == 200 and response.json()['author'] == user.username
+            response = client.get(
+                f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}/comments/{comments[1]["id"]}/')
+            assert response.status_code == 404, (
+                'Проверьте, что архивный комментарий не читается через чужое произведение'
+            )
+            data = client.get(reviews_url).json()
+            assert data['count'] == 3, 'Проверьте, что список отзывов включает архив'
+            assert data['results'][-1]['id'] == reviews[0]['id']
+            assert data['results'][-1]['author'] == admin.username
+            assert client.get(title_url).json()['rating'] == rating, (
+                'Проверьте, что рейтинг учитывает архивные отзывы'
+            )
+            response = admin_client.post(reviews_url, data={'text': 'Снова', 'score': 1})
+            assert response.status_code == 400, (
+                'Проверьте, что нельзя оставить второй отзыв поверх архивного'
+            )
+            response = auth_client(user).post(comments_url, data={'text': 'Новый'})
+            assert response.status_code == 404, 'Архивные отзывы доступны только для чтения'
+            out = io.StringIO()
+            call_command('check_counters', stdout=out)
+            assert 'расхождений 0' in out.getvalue() and 'расхождений 1' not in out.getvalue(), (
+                'Проверьте, что счётчики учитывают архивные записи'
+            )
+            call_command('restore_archived')
+        assert ArchivedComment.objects.count() == 0 and ArchivedReview.objects.count() == 0
+        assert Review.objects.get(pk=reviews[0]['id']).pub_date == old, (
+            'Проверьте, что при возврате сохраняется дата публикации'
+        )
+        assert client.get(comments_url).json() == before
+
+    def test_02_disabled_by_default(self, admin_client, admin):
+        create_comments(admin_client, admin)
+        with pytest.raises(Exception):
+            call_command('archive_old_rows')
+        assert ArchivedComment.objects.count() == 0
+
+    def test_03_merged_order_and_changes(self, client, admin_client, admin,
+                                         monkeypatch):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        now = timezone.now()
+        Review.objects.filter(pk=reviews[0]['id']).update(
+            pub_date=now - dt.timedelta(days=500))
+        Review.objects.filter(pk=reviews[1]['id']).update(
+            pub_date=now - dt.timedelta(days=400))
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with override_settings(ARCHIVE_ENABLED=True):
+            call_command('archive_old_rows', days=365, reviews=True)
+            assert list(ArchivedReview.objects.values_list('pk', flat=True)) == [reviews[1]['id']]
+            assert Change.objects.filter(
+                model='review', object_id=reviews[1]['id'], parent_id=titles[0]['id'],
+                action=Change.UPDATE).exists(), (
+                'Проверьте, что перенос в архив попадает в ленту изменений'
+            )
+            ids = [row['id'] for row in client.get(reviews_url).json()['results']]
+            assert ids == [reviews[2]['id'], reviews[1]['id'], reviews[0]['id']], (
+                'Проверьте, что основная и архивная части списка '
+                'сливаются по дате публикации'
+            )
+            monkeypatch.setattr(PageNumberPagination, 'page_size', 1)
+            pages = [
+                client.get(reviews_url, {'page': number}).json()['results'][0]['id']
+                for number in (1, 2, 3)
+            ]
+            assert pages == ids, 'Проверьте постраничный вывод на стыке основной части и архива'
+            call_command('restore_archived')
+        assert Change.objects.filter(
+            model='review', object_id=reviews[1]['id'], action=Change.UPDATE).count() == 2
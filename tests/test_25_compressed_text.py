@@ -0,0 +1,66 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+
+from reviews.fields import CompressedText, reset_dictionary_cache
+from reviews.models import Review
+from .common import create_reviews
+
+LONG_TEXT = ('Очень длинный и подробный отзыв о сюжете и героях. ' * 40).strip()
+
+
+def stored_text(review_id):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT text FROM reviews_review WHERE id = %s', [review_id])
+        return cursor.fetchone()[0]
+
+
+@pytest.fixture(autouse=True)
+def fresh_dictionary():
+    reset_dictionary_cache()
+    yield
+    reset_dictionary_cache()
+
+
+class Test25CompressedText:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_long_text_is_compressed(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        with override_settings(COMPRESSED_TEXT_ENABLED=True):
+            admin_client.patch(url, data={'text': LONG_TEXT})
+            stored = stored_text(reviews[0]['id'])
+            assert isinstance(stored, bytes) and len(stored) < len(LONG_TEXT.encode()), (
+                'Проверьте, что длинный текст хранится в сжатом виде'
+            )
+            assert isinstance(stored_text(reviews[1]['id']), str), (
+                'Проверьте, что короткие тексты хранятся как есть'
+            )
+            review = Review.objects.get(pk=reviews[0]['id'])
+            assert type(review.text) is CompressedText
+            assert client.get(url).json()['text'] == LONG_TEXT
+        assert client.get(url).json()['text'] == LONG_TEXT, (
+            'Проверьте, что сжатые тексты читаются и после отключения сжатия'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_convert_with_dictionary(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        Review.objects.filter(pk=reviews[0]['id']).update(text=LONG_TEXT)
+        with override_settings(COMPRESSED_TEXT_ENABLED=True):
+            call_command('train_text_dictionary', stdout=io.StringIO())
+            call_command('convert_text_storage')
+            stored = stored_text(reviews[0]['id'])
+            assert isinstance(stored, bytes) and stored[1:3] != b'\x00\x00', (
+                'Проверьте, что конвертация сжимает тексты общим словарём'
+            )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        assert client.get(url).json()['text'] == LONG_TEXT
+        call_command('convert_text_storage')
+        assert stored_text(reviews[0]['id']) == LONG_TEXT, (
+            'Проверьте обратную конвертацию при выключенном сжатии'
+        )
@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+from django.http import HttpResponse
+from django.test import override_settings
+
+from api.writer import WriteQueueTimeout, writer
+from reviews.models import Genre
+
+
+class Test26WriteQueue:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_api_writes_go_through_writer(self, admin_client):
+        jobs = writer.stats()['jobs']
+        with override_settings(WRITE_QUEUE_ENABLED=True):
+            response = admin_client.post('/api/v1/genres/', data={'name': 'Ужасы', 'slug': 'horror'})
+            assert response.status_code == 201
+            assert admin_client.get('/api/v1/genres/').json()['count'] == 1
+        assert writer.stats()['jobs'] == jobs + 1, (
+            'Проверьте, что изменяющие запросы выполняются в потоке записи'
+        )
+        assert Genre.objects.filter(slug='horror').exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_group_commit_and_isolation(self):
+        def create(slug, fail=False):
+            def job():
+                Genre.objects.create(name=slug, slug=slug)
+                if fail:
+                    raise ValueError(slug)
+                return HttpResponse(status=201)
+            return job
+
+        batches = writer.stats()['batches']
+        results = {}
+        threads = [
+            threading.Thread(target=lambda slug=f'genre-{number}': results.update(
+                {slug: writer.submit(create(slug)).status_code}))
+            for number in range(10)
+        ]
+        with override_settings(WRITE_QUEUE_INTERVAL=0.2):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            with pytest.raises(ValueError):
+                writer.submit(create('broken', fail=True))
+        assert set(results.values()) == {201}
+        assert Genre.objects.filter(slug__startswith='genre-').count() == 10
+        assert writer.stats()['batches'] - batches < 11, (
+            'Проверьте, что записи нескольких запросов объединяются в одну транзакцию'
+        )
+        assert not Genre.objects.filter(slug='broken').exists(), (
+            'Проверьте, что ошибка откатывает изменения только своего запроса'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_only_orm_writes_are_queued(self, client, admin_client, mailoutbox):
+        jobs = writer.stats()['jobs']
+        with override_settings(WRITE_QUEUE_ENABLED=True):
+            response = admin_client.post('/api/v1/genres/', data={'name': 'Без слага'})
+            assert response.status_code == 400
+            assert writer.stats()['jobs'] == jobs, (
+                'Проверьте, что валидация выполняется до постановки в очередь'
+            )
+            response = client.post('/api/v1/auth/signup/', data={
+                'username': 'queued', 'email': 'queued@yamdb.fake'})
+            assert response.status_code == 200
+        assert writer.stats()['jobs'] == jobs + 1
+        assert len(mailoutbox) == 1, (
+            'Проверьте, что письмо отправляется после фиксации записи'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_timeout(self, admin_client, monkeypatch):
+        def cancelled(func):
+            writer.count('cancelled')
+            raise WriteQueueTimeout
+
+        monkeypatch.setattr(writer, 'submit', cancelled)
+        with override_settings(WRITE_QUEUE_ENABLED=True):
+            response = admin_client.post('/api/v1/genres/', data={'name': 'Ужасы', 'slug': 'horror'})
+        assert response.status_code == 503 and 'Retry-After' in response
+        assert not Genre.objects.filter(slug='horror').exists()
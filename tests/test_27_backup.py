@@ -0,0 +1,80 @@
+import gzip
+import sqlite3
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from reviews.models import Title
+from .common import create_titles
+
+
+def count_titles(path):
+    connection = sqlite3.connect(str(path))
+    try:
+        return connection.execute(
+            'SELECT COUNT(*) FROM reviews_title').fetchone()[0]
+    finally:
+        connection.close()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27Backup:
+
+    def test_01_snapshot(self, admin_client, tmp_path):
+        create_titles(admin_client)
+        target = tmp_path / 'snapshot.sqlite3'
+        out = StringIO()
+        call_command('snapshot', str(target), pages=1, sleep=0, stdout=out)
+        assert count_titles(target) == 2, (
+            'Проверьте, что снимок содержит данные базы'
+        )
+        connection = sqlite3.connect(str(target))
+        mode = connection.execute('PRAGMA journal_mode').fetchone()[0]
+        connection.close()
+        assert mode == 'delete', (
+            'Проверьте, что снимок не зависит от файлов WAL'
+        )
+        assert list(tmp_path.iterdir()) == [target], (
+            'Проверьте, что временные файлы снимка удаляются'
+        )
+
+    def test_02_compressed_snapshot(self, admin_client, tmp_path):
+        create_titles(admin_client)
+        target = tmp_path / 'snapshot.sqlite3.gz'
+        call_command('snapshot', str(target), stdout=StringIO())
+        with gzip.open(target) as packed:
+            assert packed.read(16) == b'SQLite format 3\x00', (
+                'Проверьте, что снимок с расширением .gz сжимается gzip'
+            )
+        replica = tmp_path / 'replica.sqlite3'
+        call_command(
+            'restore_snapshot', str(target), target=str(replica),
+            stdout=StringIO()
+        )
+        assert count_titles(replica) == 2, (
+            'Проверьте, что сжатый снимок разворачивается в отдельный файл'
+        )
+
+    def test_03_restore_into_database(self, admin_client, tmp_path):
+        create_titles(admin_client)
+        target = tmp_path / 'snapshot.sqlite3.gz'
+        call_command('snapshot', str(target), stdout=StringIO())
+        Title.objects.all().delete()
+        call_command(
+            'restore_snapshot', str(target), pages=1, sleep=0,
+            stdout=StringIO()
+        )
+        assert Title.objects.count() == 2, (
+            'Проверьте, что снимок восстанавливается в текущую базу'
+        )
+
+    def test_04_integrity_failure(self, admin_client, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            'api.backup.integrity_errors', lambda path: ['page 2 corrupt'])
+        target = tmp_path / 'snapshot.sqlite3'
+        with pytest.raises(CommandError):
+            call_command('snapshot', str(target), stdout=StringIO())
+        assert list(tmp_path.iterdir()) == [], (
+            'Проверьте, что снимок с ошибками целостности не сохраняется'
+        )
@@ -0,0 +1,46 @@
+import pytest
+from django.test import override_settings
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28LeanMiddleware:
+
+    def test_01_api_skips_session(self, client, admin_client):
+        response = client.get('/api/v1/categories/')
+        assert response.status_code == 200
+        assert not hasattr(response.wsgi_request, 'session'), (
+            'Проверьте, что запросы к API не проходят через сессии'
+        )
+        assert not hasattr(response.wsgi_request, '_messages'), (
+            'Проверьте, что запросы к API не проходят через messages'
+        )
+        response = admin_client.get('/api/v1/users/me/')
+        assert response.status_code == 200, (
+            'Проверьте, что JWT-аутентификация работает без сессий'
+        )
+
+    def test_02_api_post_without_csrf(self, admin_client):
+        admin_client.cookies['sessionid'] = 'stale'
+        response = admin_client.post(
+            '/api/v1/genres/', data={'name': 'Ужасы', 'slug': 'horror'})
+        assert response.status_code == 201, (
+            'Проверьте, что POST к API не проверяет CSRF-токен'
+        )
+
+    def test_03_admin_keeps_full_stack(self, client):
+        response = client.get('/admin/login/')
+        assert response.status_code == 200
+        assert hasattr(response.wsgi_request, 'session'), (
+            'Проверьте, что админка работает с полным стеком middleware'
+        )
+        assert 'csrftoken' in response.cookies, (
+            'Проверьте, что админка по-прежнему выдаёт CSRF-токен'
+        )
+
+    def test_04_prefixes_setting(self, client):
+        with override_settings(LEAN_MIDDLEWARE_PREFIXES=()):
+            response = client.get('/api/v1/categories/')
+        assert hasattr(response.wsgi_request, 'session'), (
+            'Проверьте, что пустой LEAN_MIDDLEWARE_PREFIXES '
+            'возвращает полный стек'
+        )
@@ -0,0 +1,130 @@
+import pytest
+from django.test import override_settings
+
+from api.middleware import admission_gates
+from .common import create_titles
+
+BATCH_URL = '/api/v1/batch/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29Batch:
+
+    def test_01_reads(self, admin_client, admin):
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.post(BATCH_URL, data={'requests': [
+            {'url': '/api/v1/users/me/'},
+            {'url': '/api/v1/titles/?page=1'},
+            {'url': f'/api/v1/titles/{titles[0]["id"]}/'},
+            {'url': '/api/v1/genres/'},
+            {'url': '/api/v1/categories/'},
+        ]}, format='json')
+        assert response.status_code == 200, (
+            'Проверьте, что POST к /api/v1/batch/ возвращает 200'
+        )
+        responses = response.json()['responses']
+        assert [item['status'] for item in responses] == [200] * 5, (
+            'Проверьте, что у каждого подзапроса свой код ответа'
+        )
+        assert responses[0]['body']['username'] == admin.username, (
+            'Проверьте, что подзапросы выполняются от имени пользователя пакета'
+        )
+        assert responses[1]['body']['count'] == 2
+        assert responses[2]['body']['name'] == titles[0]['name']
+        assert responses[3]['body']['count'] == 3
+        assert responses[4]['body']['count'] == 2
+
+    def test_02_anonymous(self, client, admin_client):
+        create_titles(admin_client)
+        response = client.post(BATCH_URL, data={'requests': [
+            {'url': '/api/v1/users/me/'},
+            {'url': '/api/v1/titles/'},
+            {'method': 'POST', 'url': '/api/v1/genres/',
+             'body': {'name': 'Боевик', 'slug': 'action'}},
+        ]}, content_type='application/json')
+        assert [item['status'] for item in response.json()['responses']] == [
+            401, 200, 401], (
+            'Проверьте, что права проверяются для каждого подзапроса'
+        )
+
+    def test_03_writes_in_order(self, admin_client):
+        create_titles(admin_client)
+        response = admin_client.post(BATCH_URL, data={'requests': [
+            {'method': 'POST', 'url': '/api/v1/genres/',
+             'body': {'name': 'Боевик', 'slug': 'action'}},
+            {'url': '/api/v1/genres/'},
+            {'method': 'DELETE', 'url': '/api/v1/genres/action/'},
+            {'url': '/api/v1/genres/'},
+        ]}, format='json')
+        responses = response.json()['responses']
+        assert [item['status'] for item in responses] == [
+            201, 200, 204, 200]
+        assert [responses[1]['body']['count'],
+                responses[3]['body']['count']] == [4, 3], (
+            'Проверьте, что чтения после записи видят её результат'
+        )
+
+    def test_04_thread_pool(self, admin_client):
+        create_titles(admin_client)
+        data = {'requests': [
+            {'url': '/api/v1/genres/'}, {'url': '/api/v1/categories/'},
+            {'method': 'POST', 'url': '/api/v1/genres/',
+             'body': {'name': 'Боевик', 'slug': 'action'}},
+            {'url': '/api/v1/genres/'}, {'url': '/api/v1/users/me/'}]}
+        with override_settings(BATCH_MAX_WORKERS=4):
+            response = admin_client.post(BATCH_URL, data=data, format='json')
+        responses = response.json()['responses']
+        assert [item['status'] for item in responses] == [
+            200, 200, 201, 200, 200]
+        assert [responses[0]['body']['count'], responses[1]['body']['count'],
+                responses[3]['body']['count']] == [3, 2, 4], (
+            'Проверьте, что чтения в пуле потоков видят предыдущие записи'
+        )
+
+    def test_05_validation(self, admin_client):
+        response = admin_client.post(BATCH_URL, data={'requests': [
+            {'url': '/api/v1/nothing/'}]}, format='json')
+        assert response.json()['responses'][0]['status'] == 404, (
+            'Проверьте, что неизвестный адрес даёт 404 в ответе подзапроса'
+        )
+        for url in (BATCH_URL, '/admin/', 'http://example.com/api/v1/'):
+            response = admin_client.post(BATCH_URL, data={'requests': [
+                {'url': url}]}, format='json')
+            assert response.status_code == 400, (
+                f'Проверьте, что адрес {url} нельзя передать в пакете'
+            )
+        response = admin_client.post(
+            BATCH_URL, data={'requests': []}, format='json')
+        assert response.status_code == 400
+        with override_settings(BATCH_MAX_REQUESTS=2):
+            response = admin_client.post(BATCH_URL, data={'requests': [
+                {'url': '/api/v1/genres/'}] * 3}, format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что число подзапросов ограничено'
+        )
+
+    def test_06_admission_per_item(self, admin_client):
+        limits = {
+            'read': {'concurrency': 0, 'queue': 0},
+            'write': {'concurrency': 4, 'queue': 4},
+            'auth': {'concurrency': 4, 'queue': 4},
+        }
+        admission_gates.clear()
+        try:
+            with override_settings(ADMISSION_LIMITS=limits):
+                response = admin_client.post(BATCH_URL, data={'requests': [
+                    {'method': 'POST', 'url': '/api/v1/genres/',
+                     'body': {'name': 'Боевик', 'slug': 'action'}},
+                    {'url': '/api/v1/genres/'},
+                ]}, format='json')
+                stats = dict(admission_gates['write'].stats())
+        finally:
+            admission_gates.clear()
+        assert response.status_code == 200
+        assert [item['status'] for item in response.json()['responses']] == [
+            201, 503], (
+            'Проверьте, что лимиты применяются к каждому подзапросу'
+        )
+        assert stats['admitted'] == 1, (
+            'Проверьте, что сам пакет не занимает слот записи'
+        )
@@ -0,0 +1,86 @@
+import pytest
+
+from reviews import paginators
+from users.models import User
+
+CHANGELIST_URL = '/admin/users/user/'
+
+
+def create_admin_users():
+    for username in ('alice', 'alina', 'Albert', 'malik', 'bob'):
+        User.objects.create_user(
+            username=username, email=f'{username.lower()}@yamdb.fake',
+            role='user'
+        )
+
+
+def changelist(client, user_superuser, **params):
+    client.force_login(user_superuser)
+    response = client.get(CHANGELIST_URL, params)
+    assert response.status_code == 200, (
+        f'Проверьте, что страница {CHANGELIST_URL} открывается у суперпользователя'
+    )
+    return response.context['cl']
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30AdminSearch:
+
+    def test_01_prefix_search(self, client, user_superuser):
+        create_admin_users()
+        found = {
+            user.username
+            for user in changelist(client, user_superuser, q='ali').result_list
+        }
+        assert found == {'alice', 'alina'}, (
+            'Проверьте, что поиск в админке ищет пользователей по префиксу '
+            'username, а не по подстроке'
+        )
+        found = {
+            user.username
+            for user in changelist(client, user_superuser, q='bob@').result_list
+        }
+        assert found == {'bob'}, (
+            'Проверьте, что поиск в админке ищет пользователей по префиксу email'
+        )
+
+    def test_02_prefix_search_case(self, client, user_superuser):
+        create_admin_users()
+        found = {
+            user.username
+            for user in changelist(client, user_superuser, q='Al').result_list
+        }
+        assert found == {'Albert'}, (
+            'Проверьте, что поиск по префиксу в админке учитывает регистр'
+        )
+        found = {
+            user.username
+            for user in changelist(client, user_superuser, q='  ').result_list
+        }
+        assert len(found) == User.objects.count(), (
+            'Проверьте, что пустой поисковый запрос не фильтрует пользователей'
+        )
+
+    def test_03_estimated_count(self, client, user_superuser, monkeypatch):
+        create_admin_users()
+        User.objects.filter(username='alice').delete()
+        exact = User.objects.count()
+        estimate = paginators.estimate_row_count(User)
+        assert estimate != exact
+
+        assert changelist(client, user_superuser).result_count == exact, (
+            'Проверьте, что при малой таблице админка считает строки точно'
+        )
+
+        monkeypatch.setattr(paginators, 'ESTIMATE_MIN_ROWS', 1)
+        assert changelist(client, user_superuser).result_count == estimate, (
+            'Проверьте, что без фильтров админка берёт оценку числа строк'
+        )
+        cl = changelist(client, user_superuser, role='user')
+        assert cl.result_count == User.objects.filter(role='user').count(), (
+            'Проверьте, что с фильтром админка считает строки точно'
+        )
+        cl = changelist(client, user_superuser, q='ali')
+        assert cl.result_count == 1, (
+            'Проверьте, что при поиске админка считает строки точно'
+        )